@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchedWriter:
+    """Buffers documents in a bounded asyncio queue and flushes them in batches.
+
+    A background task calls ``flush`` once ``batch_size`` documents are
+    buffered or ``flush_interval`` seconds after the first one arrived. When the
+    queue is full, producers wait up to ``block_timeout`` seconds
+    (backpressure) before the document is dropped. Until ``start`` is called,
+    or after ``stop``, documents are written through immediately.
+    """
+
+    def __init__(self, name: str, flush: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+                 max_queue_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, block_timeout: float = 0.05):
+        self.name = name
+        self._flush_fn = flush
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.backpressure_events = 0
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name=f"{self.name}-writer")
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def write(self, doc: Dict[str, Any]) -> None:
+        if not self.running:
+            await self._flush([doc])
+            return
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            self.backpressure_events += 1
+            try:
+                await asyncio.wait_for(self._queue.put(doc), self.block_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning("%s queue full, dropped document", self.name)
+                return
+        self.enqueued += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if doc is _STOP:
+                    stopping = True
+                    break
+                batch.append(doc)
+            await self._flush(batch)
+
+        # Drain anything that slipped in behind the stop marker
+        remaining = []
+        while not self._queue.empty():
+            doc = self._queue.get_nowait()
+            if doc is not _STOP:
+                remaining.append(doc)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await self._flush_fn(batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("%s failed to flush %d documents", self.name, len(batch))
+        finally:
+            self.flushes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "backpressure_events": self.backpressure_events,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,244 @@
+"""End-to-end API benchmark for the storefront hot paths.
+
+Seeds a deterministic synthetic catalog (see seed_data.py), then runs
+closed-loop virtual users against the app in-process for a fixed duration:
+
+* shoppers browse a product page, open a product, add a variant to their
+  cart, view the cart and, for ``--checkout-ratio`` of journeys, check out;
+* admins poll the dashboard stats.
+
+Payments go through FakePaymentGateway. Throughput and p50/p95/p99 latency
+are reported per route and written as JSON for comparing commits:
+
+    cd backend && python -m benchmarks.bench_api --duration 30 --output before.json
+    cd backend && python -m benchmarks.bench_api --duration 30 --compare before.json
+
+``--backend memory`` runs against mongomock-motor instead of MONGO_URL;
+numbers are only comparable between runs on the same backend. Needs httpx.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import print_table, summarize, use_benchmark_database, use_in_memory_mongo
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SHIPPING_ADDRESS = {"full_name": "Bench User", "address_line1": "1 Bench St", "city": "Pune",
+                    "postal_code": "411001", "country": "IN"}
+
+
+class Recorder:
+    """Latency samples and status codes per route label."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.recording = False
+
+    async def request(self, client, label, method, url, **kwargs):
+        # An in-memory backend never suspends; yield so the run timer can fire
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.samples.setdefault(label, []).append(elapsed)
+            if response.status_code >= 400:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+
+
+async def seed(server, args):
+    import seed_data
+
+    db = server.db
+    dataset_args = argparse.Namespace(seed=args.seed, end_date=date(2025, 1, 1), days=365)
+    loader = seed_data.BulkLoader(db, batch_size=1000, concurrency=4)
+    dataset = seed_data.SyntheticDataset(dataset_args, loader)
+    await seed_data.seed_fixtures(db)
+    await dataset.users(max(args.users, args.concurrency + args.admins))
+    await dataset.products(args.products)
+    if args.orders:
+        await dataset.orders(args.orders)
+    await loader.drain()
+    # Keep checkouts from running out of stock mid-run
+    await db.product_variants.update_many({}, {"$set": {"inventory_quantity": 10 ** 9}})
+
+
+async def prepare_dashboard(server):
+    try:
+        await server.reconcile_dashboard_stats()
+    except Exception as e:
+        # e.g. mongomock has no $unionWith; the route still measures its point read
+        print(f"warning: could not compute dashboard stats ({type(e).__name__}); using zeroed counters")
+        await server.db.dashboard_stats.update_one(
+            {"id": server.DASHBOARD_STATS_ID},
+            {"$set": {field: 0 for field in server.DASHBOARD_STATS_FIELDS}},
+            upsert=True
+        )
+
+
+async def shopper(client, recorder, headers, categories, rng, args, stop):
+    while not stop.is_set():
+        url = f"/api/products?limit={args.page_size}&status=active"
+        if rng.random() < 0.3:
+            url += f"&category={rng.choice(categories)}"
+        response = await recorder.request(client, "GET /api/products", "GET", url)
+        products = response.json().get("products", []) if response.status_code == 200 else []
+        if not products:
+            continue
+
+        product_id = rng.choice(products)["id"]
+        response = await recorder.request(client, "GET /api/products/{id}", "GET", f"/api/products/{product_id}")
+        variants = response.json().get("variants", []) if response.status_code == 200 else []
+        if not variants:
+            continue
+
+        await recorder.request(client, "POST /api/cart/items", "POST", "/api/cart/items", headers=headers,
+                               json={"variant_id": rng.choice(variants)["id"], "quantity": 1})
+        await recorder.request(client, "GET /api/cart", "GET", "/api/cart", headers=headers)
+        if rng.random() < args.checkout_ratio:
+            await recorder.request(client, "POST /api/checkout", "POST", "/api/checkout", headers=headers,
+                                   json={"shipping_address": SHIPPING_ADDRESS})
+
+
+async def admin(client, recorder, headers, stop):
+    while not stop.is_set():
+        await recorder.request(client, "GET /api/admin/dashboard/stats", "GET", "/api/admin/dashboard/stats",
+                               headers=headers)
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(recorder, elapsed, args, server):
+    routes = {}
+    for label, samples in sorted(recorder.samples.items()):
+        routes[label] = {"requests_per_s": len(samples) / elapsed, "errors": recorder.errors.get(label, 0),
+                         **summarize(samples)}
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "transactions": server.inventory_transactions_enabled,
+            "duration_s": elapsed,
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "db_name")},
+        },
+        "routes": routes,
+        "total": {"requests_per_s": len(all_samples) / elapsed,
+                  "errors": sum(recorder.errors.values()), **summarize(all_samples)},
+    }
+
+
+def print_report(report, baseline=None):
+    columns = ["route", "requests_per_s", "errors", "p50_ms", "p95_ms", "p99_ms"]
+    rows = [{"route": label, **stats} for label, stats in report["routes"].items()]
+    rows.append({"route": "TOTAL", **report["total"]})
+    if baseline:
+        columns += ["rps_change_%", "p95_change_%"]
+        before = {**baseline["routes"], "TOTAL": baseline["total"]}
+        for row in rows:
+            old = before.get(row["route"])
+            if old:
+                row["rps_change_%"] = _change(old["requests_per_s"], row["requests_per_s"])
+                row["p95_change_%"] = _change(old["p95_ms"], row["p95_ms"])
+    print_table(rows, columns)
+
+
+def _change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+async def main(args):
+    if args.backend == "memory":
+        use_in_memory_mongo()
+    use_benchmark_database(args.db_name)
+    import server
+    from payments import FakePaymentGateway
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server.payment_gateway = FakePaymentGateway(latency=args.payment_latency_ms / 1000)
+    await server.client.drop_database(args.db_name)
+    print(f"seeding {args.products} products on the {args.backend} backend ...")
+    await seed(server, args)
+    await server.startup_db()
+    await prepare_dashboard(server)
+
+    users = await server.db.users.find({"id": {"$regex": "^user-"}}, {"_id": 0, "id": 1, "email": 1}) \
+        .sort("id", 1).to_list(args.concurrency)
+    categories = await server.db.products.distinct("category")
+    admin_headers = {"Authorization": f"Bearer {server.create_access_token('admin-001', 'admin@swiftcommerce.com', 'super_admin')}"}
+
+    recorder = Recorder()
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        workers = []
+        for i, user in enumerate(users):
+            headers = {"Authorization": f"Bearer {server.create_access_token(user['id'], user['email'], 'customer')}"}
+            rng = random.Random(args.seed * 1000 + i)
+            workers.append(asyncio.create_task(shopper(client, recorder, headers, categories, rng, args, stop)))
+        workers += [asyncio.create_task(admin(client, recorder, admin_headers, stop)) for _ in range(args.admins)]
+
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        recorder.recording = False
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*workers)
+
+    report = build_report(recorder, elapsed, args, server)
+    await server.client.drop_database(args.db_name)
+    await server.shutdown_db_client()
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench_api-{report['meta']['revision'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before recording")
+    parser.add_argument("--concurrency", type=int, default=20, help="shopper virtual users")
+    parser.add_argument("--admins", type=int, default=1, help="admin virtual users polling the dashboard")
+    parser.add_argument("--checkout-ratio", type=float, default=0.2, help="share of journeys that check out")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=0, help="historical orders to seed")
+    parser.add_argument("--payment-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/bench_api-<rev>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    sys.exit(asyncio.run(main(parser.parse_args())))
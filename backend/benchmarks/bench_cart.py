@@ -0,0 +1,68 @@
+"""Benchmark GET /api/cart enrichment latency against cart size.
+
+Compares the batched ``enrich_cart_items`` helper with the previous
+per-item find_one loop. Requires a reachable MongoDB (MONGO_URL).
+
+    cd backend && python -m benchmarks.bench_cart --sizes 1 5 10 20 50
+"""
+import argparse
+import asyncio
+import uuid
+
+from benchmarks.common import print_table, summarize, timer, use_benchmark_database
+
+
+async def enrich_n_plus_one(db, items):
+    # Previous implementation, kept here as the baseline.
+    for item in items:
+        variant = await db.product_variants.find_one({"id": item["variant_id"]}, {"_id": 0})
+        if variant:
+            product = await db.products.find_one({"id": variant["product_id"]}, {"_id": 0})
+            item["variant"] = variant
+            item["product"] = product
+    return items
+
+
+async def seed(db, count):
+    products = [{"id": f"bench-prod-{i}", "sku": f"BENCH-{i}", "title": f"Bench product {i}",
+                 "description": "", "category": "Bench", "tags": [], "status": "active", "images": []}
+                for i in range(count)]
+    variants = [{"id": f"bench-var-{i}", "product_id": f"bench-prod-{i}", "sku": f"BENCH-{i}-V",
+                 "attributes": {}, "price": 10.0 + i, "inventory_quantity": 100}
+                for i in range(count)]
+    await db.products.insert_many(products)
+    await db.product_variants.insert_many(variants)
+    await db.products.create_index([("id", 1)])
+    await db.product_variants.create_index([("id", 1)])
+
+
+async def main(args):
+    use_benchmark_database(args.db_name)
+    import server
+
+    db = server.db
+    await server.client.drop_database(args.db_name)
+    await seed(db, max(args.sizes))
+
+    rows = []
+    for size in args.sizes:
+        cart_items = [{"variant_id": f"bench-var-{i}", "quantity": 1, "price": 10.0} for i in range(size)]
+        for name, enrich in (("n_plus_one", lambda items: enrich_n_plus_one(db, items)),
+                             ("batched", server.enrich_cart_items)):
+            samples = []
+            for _ in range(args.iterations):
+                items = [dict(item) for item in cart_items]
+                with timer(samples):
+                    await enrich(items)
+            rows.append({"cart_size": size, "impl": name, **summarize(samples)})
+
+    print_table(rows, ["cart_size", "impl", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    await server.client.drop_database(args.db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""Measure latency of an unrelated endpoint during a login storm.
+
+Drives concurrent POST /api/auth/login requests while probing
+GET /api/products in a loop, once with bcrypt running inline on the event
+loop (the old behaviour) and once through ``password_pool``. Requires a
+reachable MongoDB (MONGO_URL) and httpx.
+
+    cd backend && python -m benchmarks.bench_login_storm --logins 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.common import print_table, summarize, use_benchmark_database
+
+
+class InlinePool:
+    """Stand-in for BoundedWorkerPool that blocks the loop like the old code."""
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+
+async def login_storm(client, email, password, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.post("/api/auth/login", json={"email": email, "password": password})
+            response.raise_for_status()
+
+    await asyncio.gather(*(one() for _ in range(total)))
+
+
+async def probe(client, samples, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/products", params={"limit": 1})
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def run_scenario(server, pool, args):
+    server.password_pool = pool
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples, stop = [], asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, samples, stop))
+        start = time.perf_counter()
+        await login_storm(client, args.email, args.password, args.logins, args.concurrency)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+    return elapsed, samples
+
+
+async def main(args):
+    use_benchmark_database(args.db_name)
+    import server
+
+    await server.client.drop_database(args.db_name)
+    await server.db.users.insert_one({
+        "id": str(uuid.uuid4()), "email": args.email, "full_name": "Bench User", "phone": None,
+        "role": "customer", "hashed_password": server._hash_password_sync(args.password),
+        "is_active": True, "created_at": datetime.now(timezone.utc), "last_login": None
+    })
+
+    pooled = server.password_pool
+    rows = []
+    for name, pool in (("inline", InlinePool()), ("worker_pool", pooled)):
+        elapsed, samples = await run_scenario(server, pool, args)
+        rows.append({"mode": name, "logins_per_s": args.logins / elapsed, **summarize(samples)})
+
+    print_table(rows, ["mode", "logins_per_s", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    print("pool stats:", pooled.stats())
+    pooled.shutdown()
+    await server.client.drop_database(args.db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--email", default="storm@bench.local")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    asyncio.run(main(parser.parse_args()))
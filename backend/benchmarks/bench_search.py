@@ -0,0 +1,101 @@
+"""Benchmark catalog search on a large generated catalog.
+
+Compares, per query term:
+
+* ``list``      - ``GET /api/products?search=`` (unranked page, no facets);
+* ``separate``  - the same page plus a count, a category breakdown and a
+  price breakdown issued as four separate queries, which is what a faceted
+  search page needed before ``/api/products/search``;
+* ``faceted``   - ``GET /api/products/search?q=``: textScore ranking and all
+  facets from one ``$facet`` aggregation.
+
+The catalog cache is disabled so every request reaches MongoDB. Needs a
+real MongoDB (``$text`` is not available in mongomock) and httpx.
+
+    cd backend && python -m benchmarks.bench_search --products 50000
+"""
+import argparse
+import asyncio
+import os
+import uuid
+from datetime import date
+
+import httpx
+
+from benchmarks.common import print_table, summarize, timer, use_benchmark_database
+
+
+async def seed(server, args):
+    import seed_data
+
+    dataset_args = argparse.Namespace(seed=args.seed, end_date=date(2025, 1, 1), days=365)
+    loader = seed_data.BulkLoader(server.db, batch_size=1000, concurrency=4)
+    await seed_data.SyntheticDataset(dataset_args, loader).products(args.products)
+    await loader.drain()
+
+
+async def separate_queries(server, term, limit):
+    # Page, total and facets as independent round trips
+    db = server.db
+    query = {"$text": {"$search": term}}
+    page = await db.products.find(query, {"_id": 0}).limit(limit).to_list(limit)
+    total = await db.products.count_documents(query)
+    categories = await db.products.aggregate([
+        {"$match": query},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    prices = await db.products.aggregate([
+        {"$match": {**query, "min_price": {"$gte": 0, "$lt": float("inf")}}},
+        {"$bucket": {"groupBy": "$min_price", "boundaries": server.PRICE_FACET_BOUNDARIES}},
+    ]).to_list(None)
+    return page, total, categories, prices
+
+
+async def main(args):
+    use_benchmark_database(args.db_name)
+    os.environ["CATALOG_CACHE_TTL_SECONDS"] = "0"
+    import seed_data
+    import server
+
+    await server.client.drop_database(args.db_name)
+    print(f"seeding {args.products} products ...")
+    await server.reconcile_indexes(server.db)
+    await seed(server, args)
+
+    terms = args.terms or [seed_data.ADJECTIVES[0], seed_data.NOUNS["Electronics"][0],
+                           f"{seed_data.ADJECTIVES[1]} {seed_data.NOUNS['Fashion'][0]}"]
+    rows = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for term in terms:
+            variants = {
+                "list": lambda: client.get("/api/products", params={"search": term, "limit": args.limit}),
+                "separate": lambda: separate_queries(server, term, args.limit),
+                "faceted": lambda: client.get("/api/products/search", params={"q": term, "limit": args.limit}),
+            }
+            for name, run in variants.items():
+                samples = []
+                for i in range(args.warmup + args.iterations):
+                    measured = samples if i >= args.warmup else []
+                    with timer(measured):
+                        await run()
+                rows.append({"term": term, "impl": name, **summarize(samples)})
+
+            response = await client.get("/api/products/search", params={"q": term, "limit": args.limit})
+            print(f"{term!r}: {response.json()['total']} matches")
+
+    print_table(rows, ["term", "impl", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    await server.client.drop_database(args.db_name)
+    await server.shutdown_db_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--terms", nargs="+", help="search terms (default: a few seeded title words)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    asyncio.run(main(parser.parse_args()))
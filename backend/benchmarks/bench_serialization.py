@@ -0,0 +1,122 @@
+"""Benchmark response encoding: serialization time and bytes on the wire.
+
+Part one times the encoders on a product list page (``--page-size``
+products with images and variant summaries):
+
+* ``stdlib``   - jsonable_encoder + json.dumps, FastAPI's default path, plus
+  the old sorted-key json.dumps ETag;
+* ``orjson``   - orjson.dumps plus an ETag over the encoded bytes;
+* ``user: model`` vs ``user: dict`` - rebuilding UserResponse on /auth/me
+  against copying its fields from the stored user.
+
+Part two requests ``GET /api/products`` in-process with no, gzip and (when
+the brotli package is installed) br Accept-Encoding, with the catalog cache
+on, reporting latency and response size.
+
+    cd backend && python -m benchmarks.bench_serialization --backend memory
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import date
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.common import print_table, summarize, timer, use_benchmark_database, use_in_memory_mongo
+
+
+async def seed(server, args):
+    import seed_data
+
+    dataset_args = argparse.Namespace(seed=args.seed, end_date=date(2025, 1, 1), days=365)
+    loader = seed_data.BulkLoader(server.db, batch_size=1000, concurrency=4)
+    await seed_data.SyntheticDataset(dataset_args, loader).products(args.products)
+    await loader.drain()
+    images = [f"/api/images/{uuid.uuid4().hex}{uuid.uuid4().hex}.jpg" for _ in range(4)]
+    await server.db.products.update_many({}, {"$set": {"images": images}})
+
+
+def bench_encoders(server, page, user, iterations):
+    def stdlib():
+        body = json.dumps(jsonable_encoder(page)).encode()
+        etag = hashlib.sha1(json.dumps(page, sort_keys=True, default=str).encode()).hexdigest()
+        return body, etag
+
+    def fast():
+        return server.serialize(page)
+
+    def user_model():
+        model = server.UserResponse(**{k: v for k, v in user.items() if k != "hashed_password"})
+        return jsonable_encoder(model)
+
+    def user_dict():
+        return server.user_response(user)
+
+    rows = []
+    for name, run in (("stdlib", stdlib), ("orjson", fast), ("user: model", user_model), ("user: dict", user_dict)):
+        samples = []
+        for _ in range(iterations):
+            with timer(samples):
+                run()
+        rows.append({"encoder": name, **summarize(samples)})
+    print_table(rows, ["encoder", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+
+async def bench_wire(server, args):
+    from compression import supported_encodings
+
+    rows = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for encoding in ["identity", *supported_encodings()]:
+            headers = {"Accept-Encoding": encoding}
+            url = f"/api/products?limit={args.page_size}"
+            samples, size = [], 0
+            for _ in range(args.iterations):
+                with timer(samples):
+                    response = await client.get(url, headers=headers)
+                size = int(response.headers["content-length"])
+            rows.append({"accept_encoding": encoding, "bytes": size,
+                         "content_encoding": response.headers.get("content-encoding", "-"), **summarize(samples)})
+    print_table(rows, ["accept_encoding", "content_encoding", "bytes", "mean_ms", "p50_ms", "p95_ms"])
+
+
+async def main(args):
+    if args.backend == "memory":
+        use_in_memory_mongo()
+    use_benchmark_database(args.db_name)
+    import server
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await server.client.drop_database(args.db_name)
+    await seed(server, args)
+
+    products = await server.db.products.find({}, {"_id": 0}).limit(args.page_size).to_list(args.page_size)
+    page = {"products": products, "total": args.products, "skip": 0, "limit": args.page_size}
+    user = {"id": "u1", "email": "bench@example.com", "full_name": "Bench User", "phone": None,
+            "role": "customer", "is_active": True, "hashed_password": "x",
+            "created_at": products[0]["created_at"], "last_login": None}
+    stdlib_bytes, orjson_bytes = len(json.dumps(jsonable_encoder(page)).encode()), len(server.serialize(page)[0])
+    print(f"page of {len(products)} products: {stdlib_bytes} bytes (stdlib), {orjson_bytes} bytes (orjson)\n")
+
+    bench_encoders(server, page, user, args.iterations)
+    print()
+    await bench_wire(server, args)
+
+    await server.client.drop_database(args.db_name)
+    await server.shutdown_db_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    asyncio.run(main(parser.parse_args()))
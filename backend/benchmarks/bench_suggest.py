@@ -0,0 +1,97 @@
+"""Benchmark the search-as-you-type prefix index.
+
+Builds a SuggestIndex over a generated catalog (same titles, SKUs and tags
+as seed_data.py) and reports build time, traced memory, and latency of
+keystroke-by-keystroke lookups plus incremental add/remove. Runs entirely
+in memory; no MongoDB needed.
+
+    cd backend && python -m benchmarks.bench_suggest --products 100000
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import date
+
+import seed_data
+from benchmarks.common import print_table, summarize, timer
+from suggest_index import SuggestIndex
+
+
+class ProductCollector:
+    """Stands in for seed_data.BulkLoader, keeping products in a list."""
+
+    def __init__(self):
+        self.products = []
+
+    async def add(self, name, doc):
+        if name == "products" and doc["status"] == "active":
+            self.products.append(doc)
+
+
+async def iterate(products):
+    for product in products:
+        yield product
+
+
+def keystrokes(rng, products, count):
+    # Every prefix of a title word, SKU or multi-word title, as typed
+    queries = []
+    while len(queries) < count:
+        product = rng.choice(products)
+        text = rng.choice([product["title"], product["title"].split()[1], product["sku"], product["tags"][0]])
+        queries.extend(text[:i] for i in range(1, len(text) + 1))
+    return queries[:count]
+
+
+async def main(args):
+    collector = ProductCollector()
+    dataset_args = argparse.Namespace(seed=args.seed, end_date=date(2025, 1, 1), days=365)
+    await seed_data.SyntheticDataset(dataset_args, collector).products(args.products)
+    products = collector.products
+    rng = random.Random(args.seed)
+
+    tracemalloc.start()
+    index = SuggestIndex(max_products=args.max_products)
+    start = time.perf_counter()
+    await index.rebuild(iterate(products))
+    build_seconds = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    rows = []
+    samples, hits = [], 0
+    for query in keystrokes(rng, products, args.lookups):
+        with timer(samples):
+            hits += bool(index.suggest(query, args.limit))
+    rows.append({"operation": "suggest", **summarize(samples)})
+
+    samples = []
+    for i in range(args.updates):
+        product = dict(rng.choice(products), title=f"Renamed Product {i}")
+        with timer(samples):
+            index.add(product)
+    rows.append({"operation": "add (re-index)", **summarize(samples)})
+
+    samples = []
+    for product in rng.sample(products, min(args.updates, len(products))):
+        with timer(samples):
+            index.remove(product["id"])
+    rows.append({"operation": "remove", **summarize(samples)})
+
+    print(f"indexed {len(products)} active products: {index.stats()['keys']} keys, "
+          f"built in {build_seconds * 1000:.0f} ms, {memory_mb:.1f} MiB traced; "
+          f"{hits}/{args.lookups} lookups returned suggestions")
+    print_table(rows, ["operation", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--max-products", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def use_benchmark_database(db_name: str = "ecommerce_bench") -> None:
+    """Point server.py at a throwaway database.
+
+    Must run before ``import server``; load_dotenv() does not override
+    variables that are already set.
+    """
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = db_name
+
+
+def use_in_memory_mongo() -> None:
+    """Swap Motor's client for mongomock-motor's in-memory stand-in.
+
+    Must run before ``import server``. Handy where no MongoDB is available;
+    latencies then reflect the app rather than a real database, and server
+    features mongomock lacks (e.g. ``$unionWith``) fail as they would on an
+    old server.
+    """
+    import motor.motor_asyncio
+    from mongomock_motor import AsyncMongoMockClient
+
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return latency stats in milliseconds for samples given in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+@contextmanager
+def timer(samples: List[float]):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+def print_table(rows: List[Dict], columns: List[str]) -> None:
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(_fmt(row.get(c)).rjust(widths[c]) for c in columns))
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
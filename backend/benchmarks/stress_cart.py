@@ -0,0 +1,137 @@
+"""Concurrency stress test for cart mutations.
+
+Several "tabs" of the same user add items to one cart at once, mixing new
+and already-present variants. Afterwards every variant's quantity must equal
+the sum of what was added. The API's atomic $inc/$push path is compared with
+the previous read-modify-write implementation (kept here as the baseline),
+which rewrites the whole items array and loses concurrent updates. The
+baseline talks to MongoDB directly, so its latency excludes the HTTP stack;
+compare lost updates, not milliseconds.
+
+Exits non-zero if the API loses any update. Requires a reachable MongoDB
+(MONGO_URL) and httpx.
+
+    cd backend && python -m benchmarks.stress_cart --tabs 20 --adds 50 --variants 10
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.common import print_table, summarize, use_benchmark_database
+
+USER_ID = "stress-cart-user"
+
+
+async def seed(server, args):
+    db = server.db
+    await db.products.insert_one({"id": "stress-prod", "sku": "STRESS", "title": "Stress product", "description": "",
+                                  "category": "Stress", "tags": [], "status": "active", "images": []})
+    await db.product_variants.insert_many([
+        {"id": f"stress-var-{i}", "product_id": "stress-prod", "sku": f"STRESS-{i}", "attributes": {},
+         "price": 10.0, "inventory_quantity": 10 ** 9}
+        for i in range(args.variants)
+    ])
+    await db.users.insert_one({"id": USER_ID, "email": "stress-cart@bench.local", "full_name": "Stress",
+                               "phone": None, "role": "customer", "hashed_password": "!", "is_active": True,
+                               "created_at": datetime.now(timezone.utc), "last_login": None})
+    return server.create_access_token(USER_ID, "stress-cart@bench.local", "customer")
+
+
+async def legacy_add(db, variant_id, quantity):
+    # Previous implementation: read the cart, edit items in Python, $set the array back
+    cart = await db.carts.find_one({"user_id": USER_ID}, {"_id": 0})
+    items = cart.get("items", []) if cart else []
+    existing = next((i for i in items if i["variant_id"] == variant_id), None)
+    if existing:
+        existing["quantity"] += quantity
+    else:
+        items.append({"variant_id": variant_id, "quantity": quantity, "price": 10.0})
+    await db.carts.update_one({"user_id": USER_ID},
+                              {"$set": {"items": items, "updated_at": datetime.now(timezone.utc)}}, upsert=True)
+
+
+def plan(args):
+    # Same (variant, quantity) sequence for both implementations
+    rng = random.Random(args.seed)
+    return [[(f"stress-var-{rng.randrange(args.variants)}", rng.randint(1, 3)) for _ in range(args.adds)]
+            for _ in range(args.tabs)]
+
+
+async def run(name, add, tabs, server):
+    await server.db.carts.delete_many({"user_id": USER_ID})
+    samples, errors = [], 0
+
+    async def tab(adds):
+        nonlocal errors
+        for variant_id, quantity in adds:
+            start = time.perf_counter()
+            ok = await add(variant_id, quantity)
+            samples.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(tab(adds) for adds in tabs))
+    elapsed = time.perf_counter() - start
+
+    expected = {}
+    for adds in tabs:
+        for variant_id, quantity in adds:
+            expected[variant_id] = expected.get(variant_id, 0) + quantity
+    carts = await server.db.carts.find({"user_id": USER_ID}, {"_id": 0}).to_list(None)
+    actual = {}
+    for item in (carts[0]["items"] if carts else []):
+        actual[item["variant_id"]] = actual.get(item["variant_id"], 0) + item["quantity"]
+    lost = sum(expected.values()) - sum(actual.values())
+    duplicates = sum(len(cart["items"]) for cart in carts) - len(actual)
+    return {"impl": name, "carts": len(carts), "lost_units": lost, "duplicate_items": duplicates,
+            "errors": errors, "adds_per_s": len(samples) / elapsed, **summarize(samples)}
+
+
+async def main(args):
+    use_benchmark_database(args.db_name)
+    import server
+
+    await server.client.drop_database(args.db_name)
+    await server.startup_db()
+    token = await seed(server, args)
+    tabs = plan(args)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def api_add(variant_id, quantity):
+            response = await client.post("/api/cart/items", headers={"Authorization": f"Bearer {token}"},
+                                         json={"variant_id": variant_id, "quantity": quantity})
+            return response.status_code == 200
+
+        async def read_modify_write(variant_id, quantity):
+            await legacy_add(server.db, variant_id, quantity)
+            return True
+
+        rows = [await run("read_modify_write", read_modify_write, tabs, server),
+                await run("atomic (API)", api_add, tabs, server)]
+
+    print_table(rows, ["impl", "carts", "lost_units", "duplicate_items", "errors", "adds_per_s",
+                       "p50_ms", "p95_ms", "p99_ms"])
+    await server.client.drop_database(args.db_name)
+    await server.shutdown_db_client()
+
+    api = rows[-1]
+    failed = api["lost_units"] != 0 or api["duplicate_items"] != 0 or api["carts"] != 1 or api["errors"]
+    print("FAILED" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=20, help="concurrent clients editing the same cart")
+    parser.add_argument("--adds", type=int, default=50, help="add-to-cart calls per tab")
+    parser.add_argument("--variants", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    sys.exit(asyncio.run(main(parser.parse_args())))
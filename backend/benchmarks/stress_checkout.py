@@ -0,0 +1,99 @@
+"""Concurrency stress test for checkout inventory reservation.
+
+Many users race to check out the same low-stock variants. The script fails
+(exit code 1) if stock ever goes negative or if the stock consumed does not
+match the orders that succeeded. Payments go through FakePaymentGateway.
+Requires a reachable MongoDB (MONGO_URL) and httpx.
+
+    cd backend && python -m benchmarks.stress_checkout --users 200 --stock 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.common import print_table, summarize, use_benchmark_database
+
+
+async def seed(server, args):
+    db = server.db
+    await db.products.insert_one({"id": "stress-prod", "sku": "STRESS", "title": "Stress product", "description": "",
+                                  "category": "Stress", "tags": [], "status": "active", "images": []})
+    variants = [{"id": f"stress-var-{i}", "product_id": "stress-prod", "sku": f"STRESS-{i}", "attributes": {},
+                 "price": 25.0, "inventory_quantity": args.stock} for i in range(args.variants)]
+    await db.product_variants.insert_many(variants)
+
+    users, carts, tokens = [], [], []
+    for i in range(args.users):
+        user_id = f"stress-user-{i}"
+        users.append({"id": user_id, "email": f"stress{i}@bench.local", "full_name": "Stress", "phone": None,
+                      "role": "customer", "hashed_password": "!", "is_active": True,
+                      "created_at": datetime.now(timezone.utc), "last_login": None})
+        carts.append({"id": str(uuid.uuid4()), "user_id": user_id, "updated_at": datetime.now(timezone.utc),
+                      "items": [{"variant_id": v["id"], "quantity": args.quantity, "price": 25.0} for v in variants]})
+        tokens.append(server.create_access_token(user_id, users[-1]["email"], "customer"))
+    await db.users.insert_many(users)
+    await db.carts.insert_many(carts)
+    return tokens
+
+
+async def main(args):
+    use_benchmark_database(args.db_name)
+    import server
+    from payments import FakePaymentGateway
+
+    server.payment_gateway = FakePaymentGateway()
+    await server.client.drop_database(args.db_name)
+    await server.startup_db()
+    tokens = await seed(server, args)
+
+    samples, outcomes = [], {}
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def checkout(token):
+            start = time.perf_counter()
+            response = await client.post("/api/checkout", headers={"Authorization": f"Bearer {token}"},
+                                         json={"shipping_address": {"line1": "1 Bench St"}})
+            samples.append(time.perf_counter() - start)
+            outcomes[response.status_code] = outcomes.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(checkout(token) for token in tokens))
+        elapsed = time.perf_counter() - start
+
+    variants = await server.db.product_variants.find({"product_id": "stress-prod"}, {"_id": 0}).to_list(None)
+    orders = await server.db.orders.count_documents({})
+    stock = {v["id"]: v["inventory_quantity"] for v in variants}
+
+    print(f"transactions: {server.inventory_transactions_enabled}  outcomes: {outcomes}  orders: {orders}")
+    print_table([{"checkouts_per_s": len(tokens) / elapsed, **summarize(samples)}],
+                ["checkouts_per_s", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+
+    failures = []
+    for variant_id, remaining in stock.items():
+        if remaining < 0:
+            failures.append(f"{variant_id} went negative: {remaining}")
+        if args.stock - remaining != orders * args.quantity:
+            failures.append(f"{variant_id} consumed {args.stock - remaining}, expected {orders * args.quantity}")
+
+    await server.client.drop_database(args.db_name)
+    await server.shutdown_db_client()
+
+    for failure in failures:
+        print("FAIL:", failure)
+    print("OK" if not failures else "FAILED")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=2)
+    parser.add_argument("--db-name", default=f"ecommerce_bench_{uuid.uuid4().hex[:8]}")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,148 @@
+"""Incremental parsing for catalog bulk imports.
+
+Request bodies are consumed chunk by chunk and turned into one record per
+product: the product fields plus a ``variants`` list, the same shape as an
+NDJSON line. Validation and writes happen in server.py.
+
+CSV columns: ``sku, title, description, category, tags`` (``|``-separated),
+``status``, and for the variant on that row ``variant_sku, price,
+compare_at_price, cost_price, inventory_quantity, weight`` plus one
+``attr:<name>`` column per variant attribute. Consecutive rows with the same
+product ``sku`` become one product with several variants; a row without
+``variant_sku`` imports just the product.
+"""
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+PRODUCT_COLUMNS = ("sku", "title", "description", "category", "tags", "status")
+VARIANT_COLUMNS = ("price", "compare_at_price", "cost_price", "inventory_quantity", "weight")
+ATTRIBUTE_PREFIX = "attr:"
+TAG_SEPARATOR = "|"
+
+
+class ImportEncodingError(ValueError):
+    """The body is not valid UTF-8; ``row`` is the line where decoding failed."""
+
+    def __init__(self, row: int):
+        super().__init__(f"Line {row} is not valid UTF-8")
+        self.row = row
+
+
+class ImportRecord(BaseModel):
+    row: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Yield ``(line_number, line)`` pairs from a stream of UTF-8 chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    line_number = 0
+    first = True
+    async for chunk in chunks:
+        buffered = len(decoder.getstate()[0])
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            # e.start counts the bytes the decoder held back from the last chunk
+            good = chunk[:max(e.start - buffered, 0)]
+            raise ImportEncodingError(line_number + 1 + good.count(b"\n")) from None
+        if first and pending:
+            # Drop a byte-order mark, as the utf-8-sig codec would
+            pending, first = pending.removeprefix("\ufeff"), False
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip("\r")
+    try:
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportEncodingError(line_number + 1) from None
+    if pending:
+        yield line_number + 1, pending.rstrip("\r")
+
+
+async def iter_ndjson(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ImportRecord]:
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield ImportRecord(row=line_number, error=f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield ImportRecord(row=line_number, error="Expected a JSON object")
+            continue
+        yield ImportRecord(row=line_number, data=data)
+
+
+async def _csv_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, List[str]]]:
+    # Quoted fields may span lines; a record is complete once its quotes balance
+    parts: List[str] = []
+    start = 0
+    async for line_number, line in lines:
+        if not parts:
+            start = line_number
+        parts.append(line)
+        text = "\n".join(parts)
+        if text.count('"') % 2:
+            continue
+        parts = []
+        if text.strip():
+            yield start, next(csv.reader([text]))
+    if parts:
+        yield start, next(csv.reader(["\n".join(parts)]))
+
+
+def _csv_variant(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    if not row.get("variant_sku"):
+        return None
+    variant = {"sku": row["variant_sku"]}
+    variant.update({column: row[column] for column in VARIANT_COLUMNS if row.get(column)})
+    attributes = {
+        column[len(ATTRIBUTE_PREFIX):]: value
+        for column, value in row.items()
+        if column.startswith(ATTRIBUTE_PREFIX) and value
+    }
+    if attributes:
+        variant["attributes"] = attributes
+    return variant
+
+
+async def iter_csv(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ImportRecord]:
+    header: Optional[List[str]] = None
+    current: Optional[ImportRecord] = None
+    async for row_number, values in _csv_records(lines):
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        if len(values) != len(header):
+            yield ImportRecord(row=row_number, error=f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        row = dict(zip(header, values))
+        variant = _csv_variant(row)
+        if current is not None and row.get("sku") and current.data.get("sku") == row["sku"]:
+            if variant is not None:
+                current.data["variants"].append(variant)
+            continue
+        if current is not None:
+            yield current
+        product = {column: row[column] for column in PRODUCT_COLUMNS if row.get(column)}
+        if "tags" in product:
+            product["tags"] = [tag.strip() for tag in product["tags"].split(TAG_SEPARATOR) if tag.strip()]
+        product["variants"] = [variant] if variant is not None else []
+        current = ImportRecord(row=row_number, data=product)
+    if current is not None:
+        yield current
+
+
+def parse_import(chunks: AsyncIterator[bytes], import_format: str) -> AsyncIterator[ImportRecord]:
+    """Records from a ``csv`` or ``ndjson`` body, parsed as it arrives."""
+    lines = iter_lines(chunks)
+    return iter_csv(lines) if import_format == "csv" else iter_ndjson(lines)
@@ -0,0 +1,140 @@
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Already-compressed or binary payloads are never worth recompressing
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def supported_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """Pick the best of ``available`` allowed by an Accept-Encoding header.
+
+    The client's q-values decide; ties go to the server's order. ``*``
+    matches any encoding not listed explicitly, and ``q=0`` refuses one.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class EncodedBody:
+    """A response body plus its compressed forms, each made on first use, so
+    cached responses are compressed once rather than on every hit."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete responses of at least
+    ``minimum_size`` bytes with brotli or gzip, as negotiated.
+
+    Only single-message bodies are compressed; streamed responses (exports,
+    images) pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = supported_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), "")
+        encoding = negotiate(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body") or not self._compressible(start["headers"], body):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [(k, v) for k, v in start["headers"] if k != b"content-length"]
+            headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(compressed)).encode())]
+            headers = _add_vary(headers)
+            await send({**start, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers: List[Tuple[bytes, bytes]], body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for i, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
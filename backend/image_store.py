@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+# Image formats reported by PIL -> (file extension, MIME type)
+IMAGE_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "GIF": ("gif", "image/gif"),
+    "WEBP": ("webp", "image/webp"),
+}
+CONTENT_TYPES = {ext: mime for ext, mime in IMAGE_FORMATS.values()}
+# Leading bytes of each supported format, checked before any decoding
+MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+]
+SNIFF_BYTES = 12
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}\.(%s)$" % "|".join(CONTENT_TYPES))
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobInfo(BaseModel):
+    key: str
+    size: int
+    content_type: str
+
+
+def blob_key(data: bytes, extension: str) -> str:
+    """Content address: sha256 of the bytes plus the format's extension."""
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Guess the PIL format name from the first SNIFF_BYTES of a file."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for magic, image_format in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return image_format
+    return None
+
+
+def content_type_for(key: str) -> str:
+    return CONTENT_TYPES[key.rsplit(".", 1)[1]]
+
+
+class BlobStore:
+    """Write-once, content-addressed storage for image bytes.
+
+    Keys are derived from the content, so storing the same image twice is a
+    no-op and stored blobs never change (safe to cache forever).
+    """
+
+    async def put(self, data: bytes, extension: str) -> str:
+        raise NotImplementedError
+
+    async def info(self, key: str) -> Optional[BlobInfo]:
+        raise NotImplementedError
+
+    def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start`` through ``end`` inclusive."""
+        raise NotImplementedError
+
+    async def read(self, key: str) -> Optional[bytes]:
+        """Return the whole blob, or None if it does not exist."""
+        info = await self.info(key)
+        if info is None:
+            return None
+        return b"".join([chunk async for chunk in self.stream(key, 0, info.size - 1)])
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    async def put(self, data: bytes, extension: str) -> str:
+        key = blob_key(data, extension)
+        await asyncio.to_thread(self._write, self._path(key), data)
+        return key
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see partial blobs
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def info(self, key: str) -> Optional[BlobInfo]:
+        try:
+            stat = await asyncio.to_thread(self._path(key).stat)
+        except FileNotFoundError:
+            return None
+        return BlobInfo(key=key, size=stat.st_size, content_type=content_type_for(key))
+
+    async def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+
+class GridFSBlobStore(BlobStore):
+    """Stores blobs in a GridFS bucket, using the key as the file _id."""
+
+    def __init__(self, db, bucket_name: str = "images"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self.files = db[f"{bucket_name}.files"]
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+    async def put(self, data: bytes, extension: str) -> str:
+        key = blob_key(data, extension)
+        if await self.files.find_one({"_id": key}, {"_id": 1}) is None:
+            try:
+                await self.bucket.upload_from_stream_with_id(
+                    key, key, data, metadata={"contentType": content_type_for(key)}
+                )
+            except Exception:
+                # A concurrent upload of the same content won the race
+                if await self.files.find_one({"_id": key}, {"_id": 1}) is None:
+                    raise
+        return key
+
+    async def info(self, key: str) -> Optional[BlobInfo]:
+        doc = await self.files.find_one({"_id": key}, {"length": 1})
+        if doc is None:
+            return None
+        return BlobInfo(key=key, size=doc["length"], content_type=content_type_for(key))
+
+    async def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream(key)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def create_blob_store(db, default_root: Path) -> BlobStore:
+    """Build the store selected by IMAGE_STORE (``local`` or ``gridfs``)."""
+    if os.environ.get('IMAGE_STORE', 'local').lower() == 'gridfs':
+        return GridFSBlobStore(db, os.environ.get('IMAGE_GRIDFS_BUCKET', 'images'))
+    return LocalBlobStore(Path(os.environ.get('IMAGE_STORE_PATH', default_root)))
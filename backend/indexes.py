@@ -0,0 +1,137 @@
+import logging
+from typing import Any, Dict, List
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+ASC = 1
+DESC = -1
+
+# Every index the API relies on, per collection. Compound keys follow each
+# endpoint's equality filter first, then its sort (see CREATED_AT_SORT and
+# TIMESTAMP_SORT in server.py).
+INDEX_MANIFEST: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("email", ASC)], unique=True),
+        IndexModel([("created_at", DESC), ("id", DESC)]),
+    ],
+    "products": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("sku", ASC)], unique=True),
+        IndexModel([("created_at", DESC), ("id", DESC)]),
+        IndexModel([("category", ASC), ("created_at", DESC), ("id", DESC)]),
+        IndexModel([("status", ASC), ("created_at", DESC), ("id", DESC)]),
+        IndexModel([("title", "text"), ("description", "text")]),
+        # Price filters and sorts on the variant summary (see PRICE_SORTS)
+        IndexModel([("min_price", ASC), ("id", ASC)]),
+        IndexModel([("category", ASC), ("min_price", ASC), ("id", ASC)]),
+        IndexModel([("status", ASC), ("min_price", ASC), ("id", ASC)]),
+        IndexModel([("attribute_values", ASC), ("min_price", ASC), ("id", ASC)]),
+    ],
+    "product_variants": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("product_id", ASC), ("sku", ASC)]),
+        IndexModel([("sku", ASC)]),
+    ],
+    "carts": [
+        IndexModel([("user_id", ASC)], unique=True),
+    ],
+    "orders": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("order_number", ASC)], unique=True),
+        IndexModel([("user_id", ASC), ("created_at", DESC), ("id", DESC)]),
+        IndexModel([("created_at", DESC), ("id", DESC)]),
+        IndexModel([("status", ASC), ("created_at", DESC), ("id", DESC)]),
+    ],
+    "coupons": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("code", ASC)], unique=True),
+    ],
+    "activity_logs": [
+        IndexModel([("timestamp", DESC), ("id", DESC)]),
+        IndexModel([("user_id", ASC), ("timestamp", DESC), ("id", DESC)]),
+        IndexModel([("action_type", ASC), ("timestamp", DESC), ("id", DESC)]),
+    ],
+    "dashboard_stats": [
+        IndexModel([("id", ASC)], unique=True),
+    ],
+    "catalog_imports": [
+        IndexModel([("id", ASC)], unique=True),
+        IndexModel([("started_at", DESC)]),
+    ],
+}
+
+# Options that make two indexes with the same key pattern different
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "weights")
+
+
+def _differences(wanted: Dict[str, Any], existing: Dict[str, Any]) -> List[str]:
+    diffs = []
+    for option in _COMPARED_OPTIONS:
+        if option in ("unique", "sparse"):
+            if bool(wanted.get(option)) != bool(existing.get(option)):
+                diffs.append(option)
+        # Text indexes always report weights; only compare them when declared
+        elif option in wanted or (option in existing and option != "weights"):
+            if wanted.get(option) != existing.get(option):
+                diffs.append(option)
+    return diffs
+
+
+async def reconcile_indexes(db, manifest: Dict[str, List[IndexModel]] = INDEX_MANIFEST,
+                            drop_unknown: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Make the database's indexes match ``manifest``.
+
+    Missing indexes are created and indexes whose options drifted are dropped
+    and rebuilt. Indexes not in the manifest are only dropped when
+    ``drop_unknown`` is set. A failing build (e.g. duplicate keys blocking a
+    unique index) is logged and reported without stopping the others.
+    """
+    report = {}
+    for collection_name, models in manifest.items():
+        collection = db[collection_name]
+        actions = {"created": [], "rebuilt": [], "dropped": [], "failed": []}
+        try:
+            existing = {}
+            async for index in collection.list_indexes():
+                existing[index["name"]] = index
+
+            to_create = []
+            for model in models:
+                spec = model.document
+                current = existing.pop(spec["name"], None)
+                if current is None:
+                    to_create.append(model)
+                elif _differences(spec, current):
+                    logger.warning("Index %s.%s drifted (%s); rebuilding", collection_name, spec["name"],
+                                   ", ".join(_differences(spec, current)))
+                    await collection.drop_index(spec["name"])
+                    to_create.append(model)
+                    actions["rebuilt"].append(spec["name"])
+
+            for model in to_create:
+                name = model.document["name"]
+                try:
+                    await collection.create_indexes([model])
+                except OperationFailure as e:
+                    logger.error("Could not build index %s.%s: %s", collection_name, name, e)
+                    actions["failed"].append(name)
+                    continue
+                if name not in actions["rebuilt"]:
+                    actions["created"].append(name)
+
+            existing.pop("_id_", None)
+            for name in existing:
+                if drop_unknown:
+                    await collection.drop_index(name)
+                    actions["dropped"].append(name)
+                else:
+                    logger.info("Index %s.%s is not in the manifest", collection_name, name)
+        except OperationFailure as e:
+            logger.error("Index reconcile failed for %s: %s", collection_name, e)
+            actions["failed"].append(collection_name)
+        report[collection_name] = actions
+    return report
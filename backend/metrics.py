@@ -0,0 +1,242 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_COMMAND_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A labelled metric family in the Prometheus text format.
+
+    Updates come from request handlers and from pymongo's monitoring
+    threads, so every mutation takes the family's lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, labels: Tuple[str, ...], amount: float) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, amount)
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, -amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip((*self.buckets, "+Inf"), series):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == "+Inf" else f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(cumulative)}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class RequestStats:
+    """Per-request accumulator, reachable from pymongo listeners through
+    ``current_request``. Motor copies the caller's context into its executor
+    threads, so commands are attributed to the request that issued them."""
+
+    def __init__(self, scope: Dict):
+        self.scope = scope
+        self.db_commands = 0
+        self.db_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def method(self) -> str:
+        return self.scope.get("method", "")
+
+    @property
+    def route(self) -> str:
+        # FastAPI stores the matched route in the scope once routing is done
+        route = self.scope.get("route")
+        return getattr(route, "path", UNMATCHED_ROUTE)
+
+    def add_command(self, seconds: float) -> None:
+        with self._lock:
+            self.db_commands += 1
+            self.db_seconds += seconds
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class ServiceMetrics:
+    """The API's metric families plus callbacks for subsystem stats."""
+
+    def __init__(self):
+        self.requests = Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+        self.request_db_commands = Histogram("http_request_db_commands", "MongoDB commands issued per request.",
+                                             ("method", "route"), DB_COMMAND_BUCKETS)
+        self.request_db_seconds = Histogram("http_request_db_seconds", "MongoDB time per request.",
+                                            ("method", "route"))
+        self.db_commands = Histogram("mongodb_command_duration_seconds", "MongoDB command latency.", ("command",))
+        self.db_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands.", ("command",))
+        self.subsystem = Gauge("app_subsystem_stat", "Numeric stats reported by caches, pools and writers.",
+                               ("subsystem", "stat"))
+        self.in_flight.set(value=0)
+        self._families: List[Metric] = [self.requests, self.latency, self.in_flight, self.request_db_commands,
+                                        self.request_db_seconds, self.db_commands, self.db_failures, self.subsystem]
+        self._collectors: List[Callable[[], Dict[str, Dict]]] = []
+
+    def register_collector(self, collect: Callable[[], Dict[str, Dict]]) -> None:
+        """``collect()`` returns ``{subsystem: stats_dict}``; numeric values are exported."""
+        self._collectors.append(collect)
+
+    def observe_request(self, stats: RequestStats, status_code: int, seconds: float) -> None:
+        method, route = stats.method, stats.route
+        self.requests.inc(method, route, str(status_code))
+        self.latency.observe(method, route, value=seconds)
+        self.request_db_commands.observe(method, route, value=stats.db_commands)
+        self.request_db_seconds.observe(method, route, value=stats.db_seconds)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            for subsystem, values in collect().items():
+                for stat, value in values.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        self.subsystem.set(subsystem, stat, value=value)
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Feeds every MongoDB command into the metrics and the current request."""
+
+    def __init__(self, metrics: ServiceMetrics):
+        self.metrics = metrics
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        self._record(event)
+
+    def failed(self, event) -> None:
+        self.metrics.db_failures.inc(event.command_name)
+        self._record(event)
+
+    def _record(self, event) -> None:
+        seconds = event.duration_micros / 1_000_000
+        self.metrics.db_commands.observe(event.command_name, value=seconds)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_command(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and DB usage per route."""
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight.dec()
+            current_request.reset(token)
+            self.metrics.observe_request(stats, status_code, time.perf_counter() - start)
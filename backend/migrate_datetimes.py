@@ -0,0 +1,124 @@
+"""Convert ISO-8601 date strings to native BSON datetimes, in place.
+
+Older documents store created_at/updated_at/timestamp/etc. as strings. This
+walks each collection in _id order, in batches, converting string values
+with one bulk_write per batch. Progress is checkpointed in the
+``migrations`` collection after every batch, so an interrupted run picks up
+where it stopped. Each update is guarded on the original string value, so
+running it alongside live traffic or re-running it is safe.
+
+    cd backend && python migrate_datetimes.py [--batch-size 1000] [--dry-run] [--restart]
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+MIGRATION_ID = "datetimes-v1"
+
+DATE_FIELDS = {
+    "users": ["created_at", "last_login"],
+    "products": ["created_at", "updated_at"],
+    "product_variants": ["created_at"],
+    "carts": ["updated_at"],
+    "orders": ["created_at", "updated_at"],
+    "coupons": ["valid_from", "valid_to", "created_at"],
+    "activity_logs": ["timestamp"],
+    "dashboard_stats": ["updated_at", "reconciled_at"],
+}
+
+
+def parse_iso(value: str):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def migrate_collection(db, name, fields, batch_size, dry_run, restart):
+    checkpoints = db.migrations
+    checkpoint_id = f"{MIGRATION_ID}:{name}"
+    if restart:
+        await checkpoints.delete_one({"id": checkpoint_id})
+    checkpoint = await checkpoints.find_one({"id": checkpoint_id}) or {}
+    if checkpoint.get("done"):
+        print(f"{name}: already migrated")
+        return
+
+    last_id = checkpoint.get("last_id")
+    converted = checkpoint.get("converted", 0)
+    skipped = checkpoint.get("skipped", 0)
+    string_filter = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+
+    while True:
+        query = dict(string_filter)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await db[name].find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        ops = []
+        for doc in batch:
+            updates, guard = {}, {"_id": doc["_id"]}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    parsed = parse_iso(value)
+                    if parsed is None:
+                        skipped += 1
+                        continue
+                    updates[field] = parsed
+                    guard[field] = value
+            if updates:
+                ops.append(UpdateOne(guard, {"$set": updates}))
+
+        if ops and not dry_run:
+            result = await db[name].bulk_write(ops, ordered=False)
+            converted += result.modified_count
+        elif dry_run:
+            converted += len(ops)
+
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            await checkpoints.update_one(
+                {"id": checkpoint_id},
+                {"$set": {"last_id": last_id, "converted": converted, "skipped": skipped,
+                          "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        print(f"{name}: {converted} documents converted, {skipped} unparseable values skipped")
+
+    if not dry_run:
+        await checkpoints.update_one({"id": checkpoint_id}, {"$set": {"done": True}}, upsert=True)
+    print(f"{name}: done ({converted} converted, {skipped} skipped)")
+
+
+async def migrate(args):
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'ecommerce_db')]
+
+    collections = args.collections or list(DATE_FIELDS)
+    for name in collections:
+        await migrate_collection(db, name, DATE_FIELDS[name], args.batch_size, args.dry_run, args.restart)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--collections", nargs="+", choices=sorted(DATE_FIELDS))
+    parser.add_argument("--dry-run", action="store_true", help="count convertible documents without writing")
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoints")
+    asyncio.run(migrate(parser.parse_args()))
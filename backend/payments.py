@@ -0,0 +1,136 @@
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+import stripe
+from pydantic import BaseModel
+
+
+class PaymentIntentResult(BaseModel):
+    id: str
+    client_secret: Optional[str] = None
+    status: str
+    amount: int
+    currency: str
+
+
+class PaymentGateway:
+    """Async interface for the payment calls made during checkout."""
+
+    async def create_payment_intent(self, amount: int, currency: str, metadata: Dict[str, str],
+                                    idempotency_key: Optional[str] = None) -> PaymentIntentResult:
+        raise NotImplementedError
+
+    async def retrieve_payment_intent(self, intent_id: str) -> PaymentIntentResult:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class StripePaymentGateway(PaymentGateway):
+    """Stripe gateway using the SDK's native async client.
+
+    One pooled httpx client is shared by all requests. Network failures are
+    retried by the SDK, and POSTs carry idempotency keys so retries are safe.
+    """
+
+    def __init__(self, api_key: str, timeout: float = 10.0, max_retries: int = 2):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._http_client: Optional[stripe.HTTPXClient] = None
+        self._client: Optional[stripe.StripeClient] = None
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        if self._client is None:
+            self._http_client = stripe.HTTPXClient(timeout=self.timeout)
+            self._client = stripe.StripeClient(
+                self.api_key,
+                http_client=self._http_client,
+                max_network_retries=self.max_retries
+            )
+        return self._client
+
+    async def create_payment_intent(self, amount: int, currency: str, metadata: Dict[str, str],
+                                    idempotency_key: Optional[str] = None) -> PaymentIntentResult:
+        options = {"idempotency_key": idempotency_key} if idempotency_key else None
+        intent = await self.client.v1.payment_intents.create_async(
+            params={"amount": amount, "currency": currency, "metadata": metadata},
+            options=options
+        )
+        return _to_result(intent)
+
+    async def retrieve_payment_intent(self, intent_id: str) -> PaymentIntentResult:
+        intent = await self.client.v1.payment_intents.retrieve_async(intent_id)
+        return _to_result(intent)
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.close_async()
+            self._http_client = None
+            self._client = None
+
+
+class FakePaymentGateway(PaymentGateway):
+    """In-memory gateway for local development and load tests.
+
+    Intents are stored per process. ``latency`` simulates the provider round
+    trip, and ``auto_succeed`` marks new intents as paid so the confirm flow
+    can be exercised without a browser.
+    """
+
+    def __init__(self, latency: float = 0.0, auto_succeed: bool = True):
+        self.latency = latency
+        self.auto_succeed = auto_succeed
+        self.intents: Dict[str, PaymentIntentResult] = {}
+
+    async def create_payment_intent(self, amount: int, currency: str, metadata: Dict[str, str],
+                                    idempotency_key: Optional[str] = None) -> PaymentIntentResult:
+        await self._simulate_latency()
+        intent_id = f"pi_fake_{idempotency_key or uuid.uuid4().hex}"
+        if intent_id in self.intents:
+            return self.intents[intent_id]
+        intent = PaymentIntentResult(
+            id=intent_id,
+            client_secret=f"{intent_id}_secret_fake",
+            status="succeeded" if self.auto_succeed else "requires_payment_method",
+            amount=amount,
+            currency=currency
+        )
+        self.intents[intent_id] = intent
+        return intent
+
+    async def retrieve_payment_intent(self, intent_id: str) -> PaymentIntentResult:
+        await self._simulate_latency()
+        intent = self.intents.get(intent_id)
+        if intent is None:
+            raise LookupError(f"No such payment_intent: {intent_id}")
+        return intent
+
+    async def _simulate_latency(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+
+def _to_result(intent: Any) -> PaymentIntentResult:
+    return PaymentIntentResult(
+        id=intent.id,
+        client_secret=getattr(intent, "client_secret", None),
+        status=intent.status,
+        amount=intent.amount,
+        currency=intent.currency
+    )
+
+
+def create_payment_gateway() -> PaymentGateway:
+    """Build the gateway selected by PAYMENT_GATEWAY (``stripe`` or ``fake``)."""
+    if os.environ.get('PAYMENT_GATEWAY', 'stripe').lower() == 'fake':
+        return FakePaymentGateway(latency=float(os.environ.get('FAKE_PAYMENT_LATENCY_MS', '0')) / 1000)
+    return StripePaymentGateway(
+        os.environ.get('STRIPE_SECRET_KEY', ''),
+        timeout=float(os.environ.get('STRIPE_TIMEOUT_SECONDS', '10')),
+        max_retries=int(os.environ.get('STRIPE_MAX_RETRIES', '2'))
+    )
@@ -0,0 +1,26 @@
+from typing import Any, Dict, List
+
+# Products carry a summary of their variants (price range, stock, attribute
+# values) so listings can filter and sort without reading product_variants.
+# server.py keeps it current; seed_data.py writes it with generated products.
+PRODUCT_SUMMARY_FIELDS = ("min_price", "max_price", "total_stock", "attribute_values")
+SUMMARY_VARIANT_FIELDS = {"product_id", "price", "inventory_quantity", "attributes"}
+
+
+def attribute_value(name: Any, value: Any) -> str:
+    return f"{str(name).strip().lower()}:{str(value).strip().lower()}"
+
+
+def summarize_variants(variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    prices = [v["price"] for v in variants if v.get("price") is not None]
+    return {
+        "min_price": min(prices) if prices else None,
+        "max_price": max(prices) if prices else None,
+        "total_stock": sum(max(v.get("inventory_quantity") or 0, 0) for v in variants),
+        "attribute_values": sorted({
+            attribute_value(name, value)
+            for v in variants
+            for name, value in (v.get("attributes") or {}).items()
+            if value not in (None, "")
+        }),
+    }
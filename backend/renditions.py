@@ -0,0 +1,117 @@
+import asyncio
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# Named rendition sizes -> target width in pixels. Images are never upscaled.
+RENDITION_WIDTHS = {
+    "thumb": 160,
+    "small": 320,
+    "medium": 640,
+    "large": 1280,
+}
+# Output format -> (PIL format, MIME type)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+RENDITION_QUALITY = 80
+
+
+def render(data: bytes, width: int, extension: str) -> bytes:
+    """Resize ``data`` to at most ``width`` pixels wide and re-encode it.
+
+    Runs in a worker process, so it only takes and returns plain bytes.
+    """
+    pil_format = RENDITION_FORMATS[extension][0]
+    with Image.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if pil_format == "JPEG" or img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB" if pil_format == "JPEG" else "RGBA")
+        out = BytesIO()
+        img.save(out, pil_format, quality=RENDITION_QUALITY, optimize=pil_format == "JPEG")
+        return out.getvalue()
+
+
+class RenditionCache:
+    """Disk cache of resized images, generated on first request.
+
+    Renditions live at ``root/ab/<image key>/<size>.<ext>``. Source images
+    are immutable, so a cached rendition never needs invalidating.
+    Concurrent requests for the same missing rendition share one render.
+    """
+
+    def __init__(self, root: Path, run: Callable[..., Awaitable[bytes]]):
+        self.root = Path(root)
+        self._run = run
+        self._pending: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self.generated = 0
+        self.hits = 0
+
+    def path(self, key: str, size: str, extension: str) -> Path:
+        return self.root / key[:2] / key / f"{size}.{extension}"
+
+    async def get(self, key: str, size: str, extension: str,
+                  load_source: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """Return the rendition bytes, rendering them from ``load_source()``
+        if needed. Returns None when the source image does not exist."""
+        path = self.path(key, size, extension)
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+            self.hits += 1
+            return data
+        except FileNotFoundError:
+            pass
+
+        pending_key = (key, size, extension)
+        pending = self._pending.get(pending_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[pending_key] = future
+        try:
+            source = await load_source()
+            data = None
+            if source is not None:
+                data = await self._run(render, source, RENDITION_WIDTHS[size], extension)
+                await asyncio.to_thread(self._write, path, data)
+                self.generated += 1
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._pending[pending_key]
+
+    async def generate_all(self, key: str, source: bytes) -> None:
+        """Pre-render every size and format for a freshly uploaded image."""
+        async def load_source():
+            return source
+        for size in RENDITION_WIDTHS:
+            for extension in RENDITION_FORMATS:
+                await self.get(key, size, extension, load_source)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".render-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "generated": self.generated, "in_progress": len(self._pending)}
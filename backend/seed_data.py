@@ -1,65 +1,118 @@
+"""Seed the database with demo fixtures and, optionally, a synthetic dataset.
+
+With no arguments this creates the demo admin/customer accounts, six sample
+products with variants and two coupons (skipping any that already exist).
+Counts turn on the generator for capacity testing:
+
+    cd backend && python seed_data.py --users 100k --products 50k --orders 1M
+
+Generated data is deterministic for a given ``--seed`` and ``--end-date``
+(which defaults to a fixed day, not today): ids, timestamps and choices come
+from one seeded RNG, so two runs produce the same documents and a re-run
+skips what is already there. Documents are written with unordered
+``insert_many`` batches, several in flight at once. Distributions are skewed
+the way real traffic is: a few products take most orders, a minority of
+users place most of them, and most orders are already delivered.
+
+Synthetic users all log in with SYNTHETIC_PASSWORD. bcrypt is slow on
+purpose, so a handful of hashes are computed once and shared.
+"""
+import argparse
 import asyncio
 import os
+import random
+import time
+from datetime import date, datetime, timezone, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from indexes import reconcile_indexes
+from product_summary import summarize_variants
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-async def seed_database():
-    # Connect to MongoDB
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    db_name = os.environ.get('DB_NAME', 'ecommerce_db')
-    
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    print("Starting database seeding...")
-    
-    # Create Super Admin User
-    admin_email = "admin@swiftcommerce.com"
-    existing_admin = await db.users.find_one({"email": admin_email})
-    
-    if not existing_admin:
-        admin_user = {
+SYNTHETIC_PASSWORD = "password123"
+PASSWORD_HASH_COUNT = 4
+DUPLICATE_KEY = 11000
+# Fixed so that runs on different days generate identical timestamps
+DEFAULT_END_DATE = date(2025, 1, 1)
+
+CATEGORIES = {
+    # category -> (relative share of products, median price)
+    "Electronics": (20, 450.0),
+    "Fashion": (25, 60.0),
+    "Home": (15, 80.0),
+    "Beauty": (10, 25.0),
+    "Sports": (10, 90.0),
+    "Books": (10, 15.0),
+    "Audio": (5, 150.0),
+    "Photography": (5, 700.0),
+}
+ADJECTIVES = ["Classic", "Premium", "Compact", "Ultra", "Eco", "Smart", "Pro", "Essential", "Deluxe", "Urban"]
+NOUNS = {
+    "Electronics": ["Laptop", "Tablet", "Monitor", "Keyboard", "Router", "Charger"],
+    "Fashion": ["T-Shirt", "Jacket", "Sneakers", "Jeans", "Dress", "Hoodie"],
+    "Home": ["Lamp", "Blender", "Cookware Set", "Pillow", "Kettle", "Rug"],
+    "Beauty": ["Serum", "Moisturizer", "Shampoo", "Lip Balm", "Sunscreen"],
+    "Sports": ["Yoga Mat", "Dumbbell", "Running Shorts", "Water Bottle", "Bike Helmet"],
+    "Books": ["Novel", "Cookbook", "Travel Guide", "Biography", "Workbook"],
+    "Audio": ["Headphones", "Speaker", "Earbuds", "Soundbar"],
+    "Photography": ["Camera", "Lens", "Tripod", "Flash"],
+}
+VARIANT_ATTRIBUTES = {"Color": ["Black", "White", "Blue", "Red", "Green", "Grey"],
+                      "Size": ["XS", "S", "M", "L", "XL"]}
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Pune", "Hyderabad", "Kolkata", "Jaipur"]
+# (status, share) for historical orders; old orders are mostly settled
+ORDER_STATUSES = [("delivered", 55), ("shipped", 10), ("processing", 8), ("confirmed", 7),
+                  ("pending", 8), ("cancelled", 9), ("refunded", 3)]
+ITEMS_PER_ORDER = ([1, 2, 3, 4, 5], [50, 25, 12, 8, 5])
+QUANTITY = ([1, 2, 3], [75, 18, 7])
+VARIANTS_PER_PRODUCT = ([1, 2, 3, 4], [35, 30, 20, 15])
+
+
+def parse_count(value: str) -> int:
+    """``"100k"`` -> 100000, ``"1M"`` -> 1000000."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower().replace("_", "")
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def fixture_documents():
+    """The demo accounts, catalog and coupons, keyed by collection."""
+    now = datetime.now(timezone.utc)
+    users = [
+        {
             "id": "admin-001",
-            "email": admin_email,
+            "email": "admin@swiftcommerce.com",
             "full_name": "Super Admin",
             "phone": "+1234567890",
             "role": "super_admin",
             "hashed_password": pwd_context.hash("admin123"),
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": now,
             "last_login": None
-        }
-        await db.users.insert_one(admin_user)
-        print(f"✓ Created super admin user: {admin_email} (password: admin123)")
-    else:
-        print(f"✓ Super admin already exists: {admin_email}")
-    
-    # Create Regular Customer
-    customer_email = "customer@example.com"
-    existing_customer = await db.users.find_one({"email": customer_email})
-    
-    if not existing_customer:
-        customer_user = {
+        },
+        {
             "id": "customer-001",
-            "email": customer_email,
+            "email": "customer@example.com",
             "full_name": "John Doe",
             "phone": "+1234567891",
             "role": "customer",
             "hashed_password": pwd_context.hash("customer123"),
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": now,
             "last_login": None
         }
-        await db.users.insert_one(customer_user)
-        print(f"✓ Created customer user: {customer_email} (password: customer123)")
-    else:
-        print(f"✓ Customer already exists: {customer_email}")
+    ]
     
-    # Create Sample Products
     products = [
         {
             "id": "prod-001",
@@ -72,8 +125,8 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1496181133206-80ce9b88a853?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         },
         {
             "id": "prod-002",
@@ -86,8 +139,8 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         },
         {
             "id": "prod-003",
@@ -100,8 +153,8 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1523275335684-37898b6baf30?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         },
         {
             "id": "prod-004",
@@ -114,8 +167,8 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         },
         {
             "id": "prod-005",
@@ -128,8 +181,8 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1526170375885-4d8ecf77b99f?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         },
         {
             "id": "prod-006",
@@ -142,20 +195,11 @@ async def seed_database():
             "images": ["https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=600&h=600&fit=crop"],
             "created_by": "admin-001",
             "updated_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now,
+            "updated_at": now
         }
     ]
     
-    for product in products:
-        existing = await db.products.find_one({"sku": product["sku"]})
-        if not existing:
-            await db.products.insert_one(product)
-            print(f"✓ Created product: {product['title']}")
-        else:
-            print(f"✓ Product already exists: {product['title']}")
-    
-    # Create Variants for each product
     variants = [
         # Laptop variants
         {"product_id": "prod-001", "sku": "LAPTOP-001-16GB", "attributes": {"RAM": "16GB", "Storage": "512GB"}, "price": 1299.99, "compare_at_price": 1499.99, "inventory_quantity": 25},
@@ -182,20 +226,10 @@ async def seed_database():
         {"product_id": "prod-006", "sku": "SHOES-001-10", "attributes": {"Size": "10", "Color": "Blue"}, "price": 129.99, "compare_at_price": 159.99, "inventory_quantity": 40},
     ]
     
-    for variant in variants:
-        existing = await db.product_variants.find_one({"sku": variant["sku"]})
-        if not existing:
-            variant_doc = {
-                "id": f"var-{variant['sku']}",
-                **variant,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            await db.product_variants.insert_one(variant_doc)
-            print(f"✓ Created variant: {variant['sku']}")
-        else:
-            print(f"✓ Variant already exists: {variant['sku']}")
+    variants = [{"id": f"var-{variant['sku']}", **variant, "created_at": now} for variant in variants]
+    for product in products:
+        product.update(summarize_variants([v for v in variants if v["product_id"] == product["id"]]))
     
-    # Create Sample Coupons
     coupons = [
         {
             "id": "coupon-001",
@@ -206,11 +240,11 @@ async def seed_database():
             "max_discount": 100,
             "usage_limit": 1000,
             "usage_count": 0,
-            "valid_from": datetime.now(timezone.utc).isoformat(),
-            "valid_to": (datetime.now(timezone.utc) + timedelta(days=30)).isoformat(),
+            "valid_from": now,
+            "valid_to": now + timedelta(days=30),
             "is_active": True,
             "created_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now
         },
         {
             "id": "coupon-002",
@@ -221,28 +255,356 @@ async def seed_database():
             "max_discount": None,
             "usage_limit": 500,
             "usage_count": 0,
-            "valid_from": datetime.now(timezone.utc).isoformat(),
-            "valid_to": (datetime.now(timezone.utc) + timedelta(days=60)).isoformat(),
+            "valid_from": now,
+            "valid_to": now + timedelta(days=60),
             "is_active": True,
             "created_by": "admin-001",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now
         }
     ]
     
-    for coupon in coupons:
-        existing = await db.coupons.find_one({"code": coupon["code"]})
-        if not existing:
-            await db.coupons.insert_one(coupon)
-            print(f"✓ Created coupon: {coupon['code']}")
-        else:
-            print(f"✓ Coupon already exists: {coupon['code']}")
+    return {"users": users, "products": products, "product_variants": variants, "coupons": coupons}
+
+
+NATURAL_KEYS = {"users": "email", "products": "sku", "product_variants": "sku", "coupons": "code"}
+
+
+async def seed_fixtures(db):
+    for name, docs in fixture_documents().items():
+        key = NATURAL_KEYS[name]
+        ops = [UpdateOne({key: doc[key]}, {"$setOnInsert": doc}, upsert=True) for doc in docs]
+        result = await db[name].bulk_write(ops, ordered=False)
+        print(f"✓ {name}: {result.upserted_count} created, {len(docs) - result.upserted_count} already existed")
+
+
+class BulkLoader:
+    """Buffers documents per collection and writes them with unordered
+    ``insert_many`` batches, keeping up to ``concurrency`` batches in flight.
+    Duplicate-key errors are counted as skipped so re-runs are idempotent;
+    any other write error stops the load at the next flush or at drain()."""
+
+    def __init__(self, db, batch_size: int, concurrency: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.inserted = {}
+        self.skipped = {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._errors = []
+
+    async def add(self, name: str, doc: dict):
+        buffer = self.buffers.setdefault(name, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            await self._flush(name)
+
+    async def _flush(self, name: str):
+        docs = self.buffers.pop(name, [])
+        if not docs:
+            return
+        # Waiting for a slot lets earlier batches finish; stop if one failed
+        await self._slots.acquire()
+        if self._errors:
+            self._slots.release()
+            self._raise_failure()
+        task = asyncio.create_task(self._insert(name, docs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _raise_failure(self):
+        if self._errors:
+            raise self._errors[0]
+
+    async def _insert(self, name: str, docs: list):
+        try:
+            result = await self.db[name].insert_many(docs, ordered=False)
+            inserted, skipped = len(result.inserted_ids), 0
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                self._errors.append(e)
+                return
+            inserted, skipped = e.details["nInserted"], len(errors)
+        except Exception as e:
+            # Recorded before the slot is released, so the next _flush sees it
+            self._errors.append(e)
+            return
+        finally:
+            self._slots.release()
+        self.inserted[name] = self.inserted.get(name, 0) + inserted
+        self.skipped[name] = self.skipped.get(name, 0) + skipped
+
+    async def drain(self):
+        for name in list(self.buffers):
+            await self._flush(name)
+        await asyncio.gather(*self._tasks)
+        self._raise_failure()
+
+
+class SyntheticDataset:
+    """Generates users, products, variants, carts, orders and activity logs
+    from one seeded RNG, pushing each document to a BulkLoader."""
+
+    def __init__(self, args, loader: BulkLoader):
+        self.args = args
+        self.loader = loader
+        self.rng = random.Random(args.seed)
+        self.end = datetime.combine(args.end_date, datetime.min.time(), tzinfo=timezone.utc)
+        self.start = self.end - timedelta(days=args.days)
+        self.user_created = []
+        self.variants = []  # (id, product_id, sku, price)
+        self.popularity = []  # cumulative weights over self.variants
+
+    def moment(self, after: datetime = None, skew: float = 1.0) -> datetime:
+        """A timestamp between ``after`` (default: start) and the end date;
+        ``skew`` < 1 leans towards recent times."""
+        after = after or self.start
+        return after + (self.end - after) * (self.rng.random() ** skew)
+
+    async def users(self, count: int):
+        rng = self.rng
+        hashes = [pwd_context.hash(SYNTHETIC_PASSWORD) for _ in range(PASSWORD_HASH_COUNT)]
+        for i in range(count):
+            # Sign-ups grow over time
+            created_at = self.moment(skew=0.7)
+            self.user_created.append(created_at)
+            await self.loader.add("users", {
+                "id": f"user-{i:07d}",
+                "email": f"user{i:07d}@example.com",
+                "full_name": f"Test User {i}",
+                "phone": f"+91{rng.randrange(10**9, 10**10)}",
+                "role": "admin" if rng.random() < 0.002 else "customer",
+                "hashed_password": rng.choice(hashes),
+                "is_active": rng.random() > 0.02,
+                "created_at": created_at,
+                "last_login": self.moment(created_at, skew=0.3) if rng.random() < 0.8 else None
+            })
+
+    async def products(self, count: int):
+        rng = self.rng
+        categories = list(CATEGORIES)
+        shares = [CATEGORIES[c][0] for c in categories]
+        for i in range(count):
+            category = rng.choices(categories, shares)[0]
+            adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS[category])
+            product_id, sku = f"prod-{i:07d}", f"SYN-{i:07d}"
+            created_at = self.moment()
+            product = {
+                "id": product_id,
+                "sku": sku,
+                "title": f"{adjective} {noun} {rng.choice('ABCDEFGHJKLMNPRSTVXZ')}{rng.randint(100, 999)}",
+                "description": f"{adjective} {noun.lower()} from our {category.lower()} range.",
+                "category": category,
+                "tags": [category.lower(), noun.lower(), adjective.lower()],
+                "status": rng.choices(["active", "inactive", "draft"], [90, 5, 5])[0],
+                "images": [],
+                "created_by": "admin-001",
+                "updated_by": "admin-001",
+                "created_at": created_at,
+                "updated_at": self.moment(created_at, skew=2.0)
+            }
+
+            variants = []
+            base_price = CATEGORIES[category][1] * rng.lognormvariate(0, 0.5)
+            for v in range(rng.choices(*VARIANTS_PER_PRODUCT)[0]):
+                attributes = {"Color": rng.choice(VARIANT_ATTRIBUTES["Color"])}
+                if category in ("Fashion", "Sports"):
+                    attributes["Size"] = rng.choice(VARIANT_ATTRIBUTES["Size"])
+                price = round(base_price * rng.uniform(0.95, 1.25), 2)
+                variant_id, variant_sku = f"var-{sku}-{v}", f"{sku}-{v}"
+                self.variants.append((variant_id, product_id, variant_sku, price))
+                variants.append({
+                    "id": variant_id,
+                    "product_id": product_id,
+                    "sku": variant_sku,
+                    "attributes": attributes,
+                    "price": price,
+                    "compare_at_price": round(price * 1.2, 2) if rng.random() < 0.3 else None,
+                    "cost_price": round(price * rng.uniform(0.4, 0.7), 2),
+                    "inventory_quantity": 0 if rng.random() < 0.08 else min(int(rng.paretovariate(1.2) * 10), 500),
+                    "weight": round(rng.uniform(0.1, 5.0), 2),
+                    "created_at": created_at
+                })
+            # Written with the product so listing filters work without a backfill
+            await self.loader.add("products", {**product, **summarize_variants(variants)})
+            for variant in variants:
+                await self.loader.add("product_variants", variant)
+
+        # Zipf-like demand: a small share of the catalog takes most orders
+        ranks = list(range(len(self.variants)))
+        rng.shuffle(ranks)
+        total = 0.0
+        for rank in ranks:
+            total += 1.0 / (rank + 1) ** 1.1
+            self.popularity.append(total)
+
+    def pick_items(self, count: int):
+        rng = self.rng
+        picks = rng.choices(range(len(self.variants)), cum_weights=self.popularity, k=count)
+        return [(self.variants[index], rng.choices(*QUANTITY)[0]) for index in dict.fromkeys(picks)]
+
+    def pick_user(self) -> int:
+        # Earlier, longer-standing users place most orders
+        return int(len(self.user_created) * self.rng.random() ** 2.5)
+
+    async def carts(self, count: int):
+        if not self.variants:
+            return
+        rng = self.rng
+        for user_index in rng.sample(range(len(self.user_created)), min(count, len(self.user_created))):
+            items = self.pick_items(rng.choices([1, 2, 3, 4], [50, 25, 15, 10])[0])
+            await self.loader.add("carts", {
+                "id": f"cart-{user_index:07d}",
+                "user_id": f"user-{user_index:07d}",
+                "items": [{"variant_id": variant[0], "quantity": quantity, "price": variant[3]}
+                          for variant, quantity in items],
+                "updated_at": self.end - timedelta(days=14) * rng.random()
+            })
+
+    async def orders(self, count: int):
+        if not (self.variants and self.user_created):
+            return
+        rng = self.rng
+        statuses, shares = zip(*ORDER_STATUSES)
+        payment_statuses = {"pending": "pending", "cancelled": "canceled", "refunded": "refunded"}
+        for i in range(count):
+            user_index = self.pick_user()
+            user_id = f"user-{user_index:07d}"
+            created_at = self.moment(self.user_created[user_index], skew=0.8)
+            items = [{
+                "variant_id": variant_id,
+                "sku": sku,
+                "quantity": quantity,
+                "price": price,
+                "total": price * quantity
+            } for (variant_id, _, sku, price), quantity in self.pick_items(rng.choices(*ITEMS_PER_ORDER)[0])]
+            subtotal = sum(item["total"] for item in items)
+            discount = min(subtotal * 0.1, 100) if subtotal >= 50 and rng.random() < 0.1 else 0
+            tax = subtotal * 0.1
+            shipping = 10.0 if subtotal < 100 else 0
+            order_status = rng.choices(statuses, shares)[0]
+            order_id = f"order-{i:08d}"
+            order_number = f"ORD-{created_at:%Y%m%d}-{i:08X}"
+            address = {
+                "full_name": f"Test User {user_index}",
+                "address_line1": f"{rng.randint(1, 999)} Main Road",
+                "city": rng.choice(CITIES),
+                "postal_code": f"{rng.randint(100000, 999999)}",
+                "country": "IN"
+            }
+            await self.loader.add("orders", {
+                "id": order_id,
+                "order_number": order_number,
+                "user_id": user_id,
+                "items": items,
+                "subtotal": subtotal,
+                "discount": discount,
+                "tax": tax,
+                "shipping": shipping,
+                "total": subtotal - discount + tax + shipping,
+                "status": order_status,
+                "payment_intent_id": f"pi_seed_{order_number}",
+                "payment_status": payment_statuses.get(order_status, "paid"),
+                "shipping_address": address,
+                "billing_address": address,
+                "created_at": created_at,
+                "updated_at": created_at if order_status == "pending" else self.moment(created_at, skew=3.0)
+            })
+            # activity_logs has no unique id index; a fixed _id keeps re-runs idempotent
+            await self.loader.add("activity_logs", {
+                "_id": f"log-order-{i:08d}",
+                "id": f"log-order-{i:08d}",
+                "user_id": user_id,
+                "action_type": "checkout",
+                "resource_type": "order",
+                "resource_id": order_id,
+                "metadata": {"order_number": order_number},
+                "timestamp": created_at
+            })
+
+    async def admin_activity(self, count: int):
+        """Catalog and order-management events by admins."""
+        rng = self.rng
+        actions = [("update", "product"), ("update", "variant"), ("update_status", "order"), ("create", "coupon")]
+        for i in range(count):
+            action_type, resource_type = rng.choices(actions, [40, 30, 25, 5])[0]
+            await self.loader.add("activity_logs", {
+                "_id": f"log-admin-{i:08d}",
+                "id": f"log-admin-{i:08d}",
+                "user_id": "admin-001",
+                "action_type": action_type,
+                "resource_type": resource_type,
+                "resource_id": f"{resource_type}-{rng.randrange(10**6):07d}",
+                "metadata": {},
+                "timestamp": self.moment(skew=0.8)
+            })
+
+
+async def seed_database(args=None):
+    args = args or parse_args([])
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'), tz_aware=True)
+    db = client[os.environ.get('DB_NAME', 'ecommerce_db')]
+    
+    print("Starting database seeding...")
+    # Unique indexes are what make re-runs skip existing documents
+    await reconcile_indexes(db)
+    await seed_fixtures(db)
+    
+    if args.users or args.products:
+        loader = BulkLoader(db, args.batch_size, args.concurrency)
+        dataset = SyntheticDataset(args, loader)
+        steps = [
+            ("users", dataset.users, args.users),
+            ("products", dataset.products, args.products),
+            ("carts", dataset.carts, args.carts),
+            ("orders", dataset.orders, args.orders),
+            ("activity", dataset.admin_activity, args.activity_logs),
+        ]
+        for label, generate, count in steps:
+            if not count:
+                continue
+            started = time.perf_counter()
+            await generate(count)
+            await loader.drain()
+            print(f"✓ {label}: generated {count} in {time.perf_counter() - started:.1f}s")
+        for name in sorted(loader.inserted):
+            print(f"  {name}: {loader.inserted[name]} inserted, {loader.skipped.get(name, 0)} already existed")
+        # Counters no longer match the data; the next dashboard request recomputes them
+        await db.dashboard_stats.delete_one({"id": "dashboard"})
     
     print("\n✅ Database seeding completed successfully!")
     print("\nLogin Credentials:")
     print("  Admin: admin@swiftcommerce.com / admin123")
     print("  Customer: customer@example.com / customer123")
+    if args.users:
+        print(f"  Synthetic users: user0000000@example.com … / {SYNTHETIC_PASSWORD}")
     
     client.close()
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=parse_count, default=0, help="synthetic users, e.g. 100k")
+    parser.add_argument("--products", type=parse_count, default=0, help="synthetic products (1-4 variants each)")
+    parser.add_argument("--orders", type=parse_count, default=0, help="synthetic orders, e.g. 1M")
+    parser.add_argument("--carts", type=parse_count, help="users with an open cart (default: 20%% of --users)")
+    parser.add_argument("--activity-logs", type=parse_count, default=0,
+                        help="admin activity entries, on top of one checkout entry per order")
+    parser.add_argument("--days", type=int, default=365, help="history window for timestamps")
+    parser.add_argument("--end-date", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+                        default=DEFAULT_END_DATE, help="last day of history (YYYY-MM-DD, default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    args = parser.parse_args(argv)
+    if args.carts is None:
+        args.carts = args.users // 5 if args.products else 0
+    if (args.orders or args.carts) and not (args.users and args.products):
+        parser.error("--orders and --carts need --users and --products")
+    return args
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    asyncio.run(seed_database(parse_args()))
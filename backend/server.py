@@ -1,37 +1,107 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
+import json
+import orjson
+import asyncio
+import hashlib
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
 import jwt
 from enum import Enum
-import stripe
 import base64
+import re
 from io import BytesIO
 from PIL import Image
+from worker_pool import BoundedWorkerPool
+from ttl_cache import TTLCache
+from batched_writer import BatchedWriter
+from payments import create_payment_gateway
+from indexes import reconcile_indexes
+from image_store import IMAGE_FORMATS, KEY_PATTERN, SNIFF_BYTES, create_blob_store, sniff_image_format
+from renditions import RENDITION_FORMATS, RENDITION_WIDTHS, RenditionCache
+from catalog_import import ImportEncodingError, ImportRecord, parse_import
+from metrics import PROMETHEUS_CONTENT_TYPE, CommandMetricsListener, MetricsMiddleware, ServiceMetrics
+from slow_queries import SlowQueryMonitor
+from suggest_index import SuggestIndex
+from compression import CompressionMiddleware, EncodedBody, negotiate, supported_encodings
+from product_summary import PRODUCT_SUMMARY_FIELDS, SUMMARY_VARIANT_FIELDS, attribute_value, summarize_variants
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Request, latency and MongoDB command metrics, served at /metrics
+metrics = ServiceMetrics()
+
+# Opt-in slow-query log: set SLOW_QUERY_MS to record commands at or above it
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0'))
+slow_query_monitor = SlowQueryMonitor(
+    SLOW_QUERY_MS,
+    explain=os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true',
+    max_shapes=int(os.environ.get('SLOW_QUERY_MAX_SHAPES', '500'))
+) if SLOW_QUERY_MS > 0 else None
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+command_listeners = [CommandMetricsListener(metrics)] + ([slow_query_monitor] if slow_query_monitor else [])
+# tz_aware: dates come back as UTC-aware datetimes, so JSON keeps the +00:00 offset
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=command_listeners)
 db = client[os.environ['DB_NAME']]
 
-# Stripe configuration
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY', '')
+# Payment gateway (Stripe, or an in-memory fake when PAYMENT_GATEWAY=fake)
+payment_gateway = create_payment_gateway()
+
+# Uploaded images, content-addressed on local disk or in GridFS
+image_store = create_blob_store(db, ROOT_DIR / 'uploads' / 'images')
+PUBLIC_API_URL = os.environ.get('PUBLIC_API_URL', '').rstrip('/')
+IMAGE_MAX_UPLOAD_BYTES = int(os.environ.get('IMAGE_MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', str(40_000_000)))
+IMAGE_READ_CHUNK_BYTES = 64 * 1024
+
+# PIL work (validation, resizing) runs here so it never blocks the event loop
+image_pool = BoundedWorkerPool(
+    "image-processing",
+    max_workers=int(os.environ.get('IMAGE_WORKERS', '2')),
+    max_concurrency=int(os.environ.get('IMAGE_MAX_CONCURRENCY', '0')) or None
+)
+
+# Resized WebP/JPEG renditions, rendered in worker processes and cached on disk
+rendition_pool = BoundedWorkerPool(
+    "image-renditions",
+    max_workers=int(os.environ.get('IMAGE_RENDITION_WORKERS', '2')),
+    max_concurrency=int(os.environ.get('IMAGE_RENDITION_MAX_CONCURRENCY', '0')) or None,
+    use_processes=os.environ.get('IMAGE_RENDITION_EXECUTOR', 'process') == 'process'
+)
+rendition_cache = RenditionCache(
+    Path(os.environ.get('IMAGE_RENDITION_PATH', ROOT_DIR / 'uploads' / 'renditions')),
+    rendition_pool.run
+)
+IMAGE_PREGENERATE_RENDITIONS = os.environ.get('IMAGE_PREGENERATE_RENDITIONS', 'false').lower() == 'true'
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes 100-300 ms per call, so it runs on a bounded worker pool
+# instead of blocking the event loop
+password_pool = BoundedWorkerPool(
+    "password-hashing",
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '4')),
+    max_concurrency=int(os.environ.get('PASSWORD_HASH_MAX_CONCURRENCY', '0')) or None,
+    use_processes=os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread') == 'process'
+)
+
 # JWT configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
@@ -40,8 +110,18 @@ JWT_EXPIRATION_HOURS = 24
 # Security
 security = HTTPBearer()
 
+# Authenticated user lookups, keyed by user id. Entries are invalidated on
+# role/status changes in this worker; the TTL bounds staleness in the others.
+user_cache = TTLCache(
+    "users",
+    max_size=int(os.environ.get('USER_CACHE_MAX_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+)
+
 # Create the main app
-app = FastAPI(title="E-Commerce API", version="1.0.0")
+# orjson encodes the dicts handlers return; routes that already hold plain
+# JSON-ready data return responses directly and skip jsonable_encoder
+app = FastAPI(title="E-Commerce API", version="1.0.0", default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # ============= ENUMS =============
@@ -115,6 +195,11 @@ class Product(BaseModel):
     tags: List[str] = []
     status: ProductStatus = ProductStatus.ACTIVE
     images: List[str] = []
+    # Summary of the variants, kept current by refresh_product_summaries
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    total_stock: int = 0
+    attribute_values: List[str] = []  # e.g., ["color:blue", "size:m"]
     created_by: str
     updated_by: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -222,12 +307,30 @@ class ActivityLog(BaseModel):
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # ============= AUTH UTILITIES =============
-def hash_password(password: str) -> str:
+def _hash_password_sync(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify_password_sync(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password(password: str) -> str:
+    return await password_pool.run(_hash_password_sync, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(_verify_password_sync, plain_password, hashed_password)
+
+def as_utc_datetime(value: Any) -> datetime:
+    """Normalize a stored date to an aware UTC datetime.
+
+    Dates are stored as BSON datetimes; ISO strings only remain on documents
+    that migrate_datetimes.py has not converted yet.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
 def create_access_token(user_id: str, email: str, role: str) -> str:
     payload = {
         "sub": user_id,
@@ -245,13 +348,18 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
         
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        return user
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0})
+            if not user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+            user_cache.set(user_id, user)
+        if not user.get("is_active", True):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is inactive")
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 async def require_admin(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
@@ -259,6 +367,20 @@ async def require_admin(current_user: Dict[str, Any] = Depends(get_current_user)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return current_user
 
+async def _insert_activity_logs(docs: List[Dict[str, Any]]):
+    await db.activity_logs.insert_many(docs, ordered=False)
+
+# Audit logs are written in the background with insert_many so mutating
+# handlers don't pay a round trip each
+activity_log_writer = BatchedWriter(
+    "activity-logs",
+    _insert_activity_logs,
+    max_queue_size=int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', '1.0')),
+    block_timeout=float(os.environ.get('ACTIVITY_LOG_BLOCK_TIMEOUT', '0.05'))
+)
+
 async def log_activity(user_id: str, action_type: str, resource_type: str, resource_id: str, metadata: Dict = {}):
     log = ActivityLog(
         user_id=user_id,
@@ -268,10 +390,174 @@ async def log_activity(user_id: str, action_type: str, resource_type: str, resou
         metadata=metadata
     )
     doc = log.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-    await db.activity_logs.insert_one(doc)
+    await activity_log_writer.write(doc)
+
+# ============= PAGINATION =============
+# Keyset sorts; the trailing id makes every sort key unique
+CREATED_AT_SORT = [("created_at", -1), ("id", -1)]
+TIMESTAMP_SORT = [("timestamp", -1), ("id", -1)]
+
+def encode_cursor(doc: Dict[str, Any], sort: List[tuple]) -> str:
+    values = []
+    for field, _ in sort:
+        value = doc.get(field)
+        values.append({"$date": value.isoformat()} if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: List[tuple]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(sort):
+            raise ValueError("cursor does not match sort")
+        return [
+            datetime.fromisoformat(v["$date"]) if isinstance(v, dict) and "$date" in v else v
+            for v in values
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def keyset_query(query: Dict[str, Any], sort: List[tuple], values: List[Any]) -> Dict[str, Any]:
+    """Restrict ``query`` to documents that sort strictly after ``values``."""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    if "$or" in query:
+        return {"$and": [query, {"$or": clauses}]}
+    return {**query, "$or": clauses}
+
+# Upper bound for ``limit`` on paginated listings
+MAX_PAGE_SIZE = 500
+
+async def find_page(collection, query: Dict[str, Any], projection: Dict[str, Any], sort: List[tuple],
+                    limit: int, cursor: str):
+    """Fetch one keyset page. An empty cursor starts from the beginning.
+
+    Returns the documents and the cursor for the next page (None on the last page).
+    """
+    if cursor:
+        query = keyset_query(query, sort, decode_cursor(cursor, sort))
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1], sort) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+# Totals for admin listings, keyed by collection and normalized query
+count_cache = TTLCache(
+    "counts",
+    max_size=int(os.environ.get('COUNT_CACHE_MAX_SIZE', '1000')),
+    ttl=float(os.environ.get('COUNT_CACHE_TTL_SECONDS', '5'))
+)
+
+async def count_total(collection, query: Dict[str, Any], with_total: bool = True,
+                      approximate: bool = False, cached: bool = False) -> Optional[int]:
+    """Count documents for a listing response.
+
+    Returns None when the caller opted out with ``with_total=false``. For
+    unfiltered queries ``approximate`` uses collection metadata instead of a
+    scan. ``cached`` serves repeated counts from ``count_cache``.
+    """
+    if not with_total:
+        return None
+    if approximate and not query:
+        return await collection.estimated_document_count()
+    
+    key = (collection.name, json.dumps(query, sort_keys=True, default=str))
+    if cached:
+        total = count_cache.get(key)
+        if total is not None:
+            return total
+    total = await collection.count_documents(query)
+    if cached:
+        count_cache.set(key, total)
+    return total
+
+# ============= DASHBOARD STATS =============
+# Counters kept in a single document and adjusted by the handlers that change
+# them; a periodic reconcile recomputes them to correct drift.
+DASHBOARD_STATS_ID = "dashboard"
+DASHBOARD_STATS_RECONCILE_SECONDS = float(os.environ.get('DASHBOARD_STATS_RECONCILE_SECONDS', '300'))
+REVENUE_STATUSES = [OrderStatus.CONFIRMED, OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED]
+DASHBOARD_STATS_FIELDS = ["total_users", "total_products", "total_orders", "pending_orders", "total_revenue"]
+
+async def bump_dashboard_stats(**increments: float):
+    # No upsert: until the first reconcile creates the document, reads recompute
+    await db.dashboard_stats.update_one(
+        {"id": DASHBOARD_STATS_ID},
+        {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
+async def record_order_status_change(old_status: Optional[str], new_status: str, order_total: float):
+    increments = {}
+    if old_status == OrderStatus.PENDING and new_status != OrderStatus.PENDING:
+        increments["pending_orders"] = -1
+    elif new_status == OrderStatus.PENDING and old_status != OrderStatus.PENDING:
+        increments["pending_orders"] = 1
+    
+    was_revenue = old_status in REVENUE_STATUSES
+    is_revenue = new_status in REVENUE_STATUSES
+    if is_revenue and not was_revenue:
+        increments["total_revenue"] = order_total
+    elif was_revenue and not is_revenue:
+        increments["total_revenue"] = -order_total
+    
+    if increments:
+        await bump_dashboard_stats(**increments)
+
+async def compute_dashboard_stats() -> Dict[str, Any]:
+    """Recompute every dashboard counter in one aggregation."""
+    pipeline = [
+        {"$project": {"_id": 0, "kind": {"$literal": "order"}, "status": 1, "total": 1}},
+        {"$unionWith": {"coll": "users", "pipeline": [{"$project": {"_id": 0, "kind": {"$literal": "user"}}}]}},
+        {"$unionWith": {"coll": "products", "pipeline": [{"$project": {"_id": 0, "kind": {"$literal": "product"}}}]}},
+        {"$facet": {
+            "counts": [{"$group": {"_id": "$kind", "count": {"$sum": 1}}}],
+            "pending": [{"$match": {"kind": "order", "status": OrderStatus.PENDING}}, {"$count": "count"}],
+            "revenue": [
+                {"$match": {"kind": "order", "status": {"$in": REVENUE_STATUSES}}},
+                {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
+            ]
+        }}
+    ]
+    result = (await db.orders.aggregate(pipeline).to_list(1))[0]
+    counts = {c["_id"]: c["count"] for c in result["counts"]}
+    return {
+        "total_users": counts.get("user", 0),
+        "total_products": counts.get("product", 0),
+        "total_orders": counts.get("order", 0),
+        "pending_orders": result["pending"][0]["count"] if result["pending"] else 0,
+        "total_revenue": result["revenue"][0]["total_revenue"] if result["revenue"] else 0
+    }
+
+async def reconcile_dashboard_stats() -> Dict[str, Any]:
+    stats = await compute_dashboard_stats()
+    now = datetime.now(timezone.utc)
+    await db.dashboard_stats.update_one(
+        {"id": DASHBOARD_STATS_ID},
+        {"$set": {**stats, "updated_at": now, "reconciled_at": now}},
+        upsert=True
+    )
+    return stats
+
+async def run_dashboard_stats_reconciler():
+    while True:
+        try:
+            await reconcile_dashboard_stats()
+        except Exception:
+            logger.exception("Dashboard stats reconcile failed")
+        await asyncio.sleep(DASHBOARD_STATS_RECONCILE_SECONDS)
 
 # ============= AUTH ROUTES =============
+USER_RESPONSE_FIELDS = tuple(UserResponse.model_fields)
+
+def user_response(user: Dict[str, Any]) -> Dict[str, Any]:
+    """UserResponse fields of an already-validated user document.
+    
+    Auth routes return this in an ORJSONResponse; response_model stays for
+    the OpenAPI schema but FastAPI does not re-validate a returned Response.
+    """
+    return {field: user.get(field) for field in USER_RESPONSE_FIELDS}
+
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(user_data: UserCreate):
     # Check if user exists
@@ -283,25 +569,21 @@ async def register(user_data: UserCreate):
         email=user_data.email,
         full_name=user_data.full_name,
         phone=user_data.phone,
-        hashed_password=hash_password(user_data.password)
+        hashed_password=await hash_password(user_data.password)
     )
     
     doc = user.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    if doc.get('last_login'):
-        doc['last_login'] = doc['last_login'].isoformat()
     
     await db.users.insert_one(doc)
+    await bump_dashboard_stats(total_users=1)
     
     token = create_access_token(user.id, user.email, user.role)
-    user_response = UserResponse(**{k: v for k, v in user.model_dump().items() if k != 'hashed_password'})
-    
-    return TokenResponse(access_token=token, user=user_response)
+    return ORJSONResponse({"access_token": token, "token_type": "bearer", "user": user_response(doc)})
 
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["hashed_password"]):
+    if not user or not await verify_password(credentials.password, user["hashed_password"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     
     if not user["is_active"]:
@@ -310,17 +592,153 @@ async def login(credentials: UserLogin):
     # Update last login
     await db.users.update_one(
         {"id": user["id"]},
-        {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"last_login": datetime.now(timezone.utc)}}
     )
+    user_cache.invalidate(user["id"])
     
     token = create_access_token(user["id"], user["email"], user["role"])
-    user_response = UserResponse(**{k: v for k, v in user.items() if k != 'hashed_password'})
-    
-    return TokenResponse(access_token=token, user=user_response)
+    return ORJSONResponse({"access_token": token, "token_type": "bearer", "user": user_response(user)})
 
 @api_router.get("/auth/me", response_model=UserResponse)
 async def get_me(current_user: Dict = Depends(get_current_user)):
-    return UserResponse(**{k: v for k, v in current_user.items() if k != 'hashed_password'})
+    return ORJSONResponse(user_response(current_user))
+
+# ============= CATALOG CACHE =============
+# Read-through caches for product detail and list pages. Catalog mutations in
+# this worker invalidate them; the TTL bounds staleness elsewhere (including
+# stock levels changed by checkout in other workers).
+CATALOG_CACHE_TTL_SECONDS = float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '30'))
+CATALOG_CACHE_CONTROL = os.environ.get('CATALOG_CACHE_CONTROL', 'public, max-age=0, must-revalidate')
+product_cache = TTLCache("product-detail", max_size=int(os.environ.get('PRODUCT_CACHE_MAX_SIZE', '5000')), ttl=CATALOG_CACHE_TTL_SECONDS)
+product_list_cache = TTLCache("product-lists", max_size=int(os.environ.get('PRODUCT_LIST_CACHE_MAX_SIZE', '500')), ttl=CATALOG_CACHE_TTL_SECONDS)
+
+def invalidate_catalog(*product_ids: str):
+    for product_id in product_ids:
+        product_cache.invalidate(product_id)
+    product_list_cache.clear()
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+
+def serialize(payload: Any) -> tuple:
+    """Encode ``payload`` once for caching; returns ``(EncodedBody, etag)``."""
+    body = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return EncodedBody(body), f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+def conditional_response(request: Request, body: EncodedBody, etag: str):
+    """Return 304 when the client already holds ``etag``, else the body with
+    caching headers, pre-compressed when the client accepts it."""
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    accept = request.headers.get("accept-encoding")
+    encoding = negotiate(accept, supported_encodings()) if accept and 0 < COMPRESSION_MIN_BYTES <= len(body) else None
+    if encoding is None:
+        return Response(content=body.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=body.encoded(encoding), media_type="application/json", headers=headers)
+
+# Links to images served by this API; other URLs are left untouched
+IMAGE_URL_PATTERN = re.compile(r"/api/images/([0-9a-f]{64}\.[a-z]+)$")
+
+def check_rendition(size: Optional[str], image_format: str):
+    if size is not None and size not in RENDITION_WIDTHS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown image size; expected one of {', '.join(RENDITION_WIDTHS)}")
+    if image_format not in RENDITION_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown image format; expected one of {', '.join(RENDITION_FORMATS)}")
+
+def with_renditions(product: Dict, size: str, image_format: str) -> Dict:
+    """Copy of ``product`` whose uploaded image URLs point at a resized rendition."""
+    images = [
+        f"{url}?size={size}&format={image_format}" if IMAGE_URL_PATTERN.search(url) else url
+        for url in product.get("images", [])
+    ]
+    return {**product, "images": images}
+
+# ============= SEARCH SUGGESTIONS =============
+# Per-worker prefix index for search-as-you-type. Mutations in this worker
+# update it in place; a periodic rebuild picks up changes made elsewhere.
+SUGGEST_REFRESH_SECONDS = float(os.environ.get('SUGGEST_REFRESH_SECONDS', '300'))
+SUGGEST_FIELDS = {"_id": 0, "id": 1, "title": 1, "sku": 1, "tags": 1, "status": 1}
+suggest_index = SuggestIndex(
+    max_products=int(os.environ.get('SUGGEST_MAX_PRODUCTS', '100000')),
+    max_scan=int(os.environ.get('SUGGEST_MAX_SCAN', '200'))
+)
+
+async def rebuild_suggest_index():
+    await suggest_index.rebuild(db.products.find({"status": ProductStatus.ACTIVE.value}, SUGGEST_FIELDS))
+
+async def run_suggest_index_refresher():
+    while True:
+        await asyncio.sleep(SUGGEST_REFRESH_SECONDS)
+        try:
+            await rebuild_suggest_index()
+        except Exception:
+            logger.exception("Suggest index rebuild failed")
+
+# ============= PRODUCT SUMMARIES =============
+# Summary fields and how they are computed live in product_summary.py
+PRICE_SORTS = {
+    "price_asc": [("min_price", 1), ("id", 1)],
+    "price_desc": [("min_price", -1), ("id", -1)],
+}
+SUMMARY_BACKFILL_BATCH_SIZE = 500
+
+def parse_attribute_filters(filters: List[str]) -> List[str]:
+    values = []
+    for item in filters:
+        name, _, value = item.partition(":")
+        if not name.strip() or not value.strip():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid attribute filter: {item}")
+        values.append(attribute_value(name, value))
+    return values
+
+async def refresh_product_summaries(*product_ids: str):
+    """Recompute the variant summary stored on each of ``product_ids``."""
+    variants_by_product: Dict[str, List[Dict[str, Any]]] = {product_id: [] for product_id in product_ids}
+    if not variants_by_product:
+        return
+    async for variant in db.product_variants.find(
+        {"product_id": {"$in": list(variants_by_product)}},
+        {"_id": 0, "product_id": 1, "price": 1, "inventory_quantity": 1, "attributes": 1}
+    ):
+        variants_by_product[variant["product_id"]].append(variant)
+    await db.products.bulk_write([
+        UpdateOne({"id": product_id}, {"$set": summarize_variants(variants)})
+        for product_id, variants in variants_by_product.items()
+    ], ordered=False)
+
+async def backfill_product_summaries():
+    """Summarize products written before summaries existed, in batches."""
+    backfilled = 0
+    try:
+        while True:
+            batch = await db.products.find(
+                {"total_stock": {"$exists": False}}, {"_id": 0, "id": 1}
+            ).limit(SUMMARY_BACKFILL_BATCH_SIZE).to_list(SUMMARY_BACKFILL_BATCH_SIZE)
+            if not batch:
+                break
+            product_ids = [doc["id"] for doc in batch]
+            await refresh_product_summaries(*product_ids)
+            invalidate_catalog(*product_ids)
+            backfilled += len(product_ids)
+        if backfilled:
+            logger.info(f"Backfilled variant summaries for {backfilled} products")
+    except Exception:
+        logger.exception("Product summary backfill failed")
 
 # ============= PRODUCT ROUTES =============
 @api_router.post("/products", dependencies=[Depends(require_admin)])
@@ -337,22 +755,40 @@ async def create_product(product: ProductCreate, current_user: Dict = Depends(re
     )
     
     doc = prod.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.products.insert_one(doc)
+    invalidate_catalog()
+    suggest_index.add(doc)
+    await bump_dashboard_stats(total_products=1)
     await log_activity(current_user["id"], "create", "product", prod.id, {"sku": prod.sku})
     
     return {"id": prod.id, "message": "Product created successfully"}
 
 @api_router.get("/products")
 async def list_products(
+    request: Request,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     category: Optional[str] = None,
     status: Optional[ProductStatus] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    attr: Optional[List[str]] = Query(None, description="name:value, e.g. color:black; repeat to require several"),
+    sort: Optional[str] = Query(None, pattern="^(price_asc|price_desc)$"),
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    approximate_total: bool = False,
+    image_size: Optional[str] = None,
+    image_format: str = "webp"
 ):
+    check_rendition(image_size, image_format)
+    cache_key = tuple(sorted(request.query_params.multi_items()))
+    cached = product_list_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    
     query = {}
     if category:
         query["category"] = category
@@ -360,23 +796,151 @@ async def list_products(
         query["status"] = status
     if search:
         query["$text"] = {"$search": search}
+    # Price filters and sorts use the cheapest variant; unpriced products drop out of price sorts
+    price_range: Dict[str, Any] = {"$ne": None} if sort else {}
+    if min_price is not None:
+        price_range["$gte"] = min_price
+    if max_price is not None:
+        price_range["$lte"] = max_price
+    if price_range:
+        query["min_price"] = price_range
+    if in_stock is not None:
+        query["total_stock"] = {"$gt": 0} if in_stock else {"$lte": 0}
+    if attr:
+        query["attribute_values"] = {"$all": parse_attribute_filters(attr)}
+    
+    total = await count_total(db.products, query, with_total, approximate_total)
+    if cursor is not None:
+        products, next_cursor = await find_page(db.products, query, {"_id": 0}, PRICE_SORTS.get(sort, CREATED_AT_SORT), limit, cursor)
+        payload = {"products": products, "total": total, "limit": limit, "next_cursor": next_cursor}
+    else:
+        products_cursor = db.products.find(query, {"_id": 0}).sort(PRICE_SORTS.get(sort, CREATED_AT_SORT))
+        products = await products_cursor.skip(skip).limit(limit).to_list(limit)
+        payload = {"products": products, "total": total, "skip": skip, "limit": limit}
+    if image_size:
+        payload["products"] = [with_renditions(p, image_size, image_format) for p in payload["products"]]
+    
+    cached = serialize(payload)
+    product_list_cache.set(cache_key, cached)
+    return conditional_response(request, *cached)
+
+# Lower bounds of the price facet buckets (by a product's cheapest variant)
+PRICE_FACET_BOUNDARIES = [0, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+
+def search_pipeline(q: str, category: Optional[str], product_status: Optional[ProductStatus],
+                    min_price: Optional[float], max_price: Optional[float], skip: int, limit: int) -> List[Dict]:
+    """One aggregation returning a ranked page, the total and both facets.
+    
+    Each facet ignores its own filter, so the storefront can show the counts
+    for switching category or price range.
+    """
+    match: Dict[str, Any] = {"$text": {"$search": q}}
+    if product_status:
+        match["status"] = product_status
+    category_match = {"category": category} if category else {}
+    price_match: Dict[str, Any] = {}
+    if min_price is not None:
+        price_match.setdefault("min_price", {})["$gte"] = min_price
+    if max_price is not None:
+        price_match.setdefault("min_price", {})["$lte"] = max_price
+    
+    def filtered(*stages, skip_category=False, skip_price=False):
+        filters = {**({} if skip_category else category_match), **({} if skip_price else price_match)}
+        return ([{"$match": filters}] if filters else []) + list(stages)
+    
+    return [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        {"$project": {"_id": 0}},
+        {"$facet": {
+            "products": filtered({"$sort": {"score": -1, "id": 1}}, {"$skip": skip}, {"$limit": limit}),
+            "total": filtered({"$count": "count"}),
+            "categories": filtered(
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                skip_category=True
+            ),
+            "prices": filtered(
+                # $bucket rejects the whole aggregation for a value outside the
+                # boundaries, e.g. a negative price
+                {"$match": {"min_price": {"$gte": PRICE_FACET_BOUNDARIES[0], "$lt": PRICE_FACET_BOUNDARIES[-1]}}},
+                {"$bucket": {"groupBy": "$min_price", "boundaries": PRICE_FACET_BOUNDARIES,
+                             "output": {"count": {"$sum": 1}}}},
+                skip_price=True
+            ),
+        }},
+    ]
+
+@api_router.get("/products/search")
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    category: Optional[str] = None,
+    status: Optional[ProductStatus] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    image_size: Optional[str] = None,
+    image_format: str = "webp"
+):
+    """Relevance-ranked search with category and price facets."""
+    check_rendition(image_size, image_format)
+    cache_key = ("search", *sorted(request.query_params.multi_items()))
+    cached = product_list_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    
+    pipeline = search_pipeline(q, category, status, min_price, max_price, skip, limit)
+    result = (await db.products.aggregate(pipeline).to_list(1))[0]
+    bounds = dict(zip(PRICE_FACET_BOUNDARIES, PRICE_FACET_BOUNDARIES[1:]))
+    products = result["products"]
+    if image_size:
+        products = [with_renditions(p, image_size, image_format) for p in products]
+    payload = {
+        "products": products,
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "skip": skip,
+        "limit": limit,
+        "facets": {
+            "categories": [{"category": c["_id"], "count": c["count"]} for c in result["categories"]],
+            "prices": [
+                {"min": b["_id"], "max": None if bounds[b["_id"]] == float("inf") else bounds[b["_id"]], "count": b["count"]}
+                for b in result["prices"]
+            ],
+        },
+    }
     
-    products = await db.products.find(query, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-    total = await db.products.count_documents(query)
-    
-    return {"products": products, "total": total, "skip": skip, "limit": limit}
+    cached = serialize(payload)
+    product_list_cache.set(cache_key, cached)
+    return conditional_response(request, *cached)
+
+@api_router.get("/products/suggest")
+async def suggest_products(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(8, ge=1, le=20)):
+    """Search-as-you-type suggestions from the in-memory prefix index."""
+    return {"query": q, "suggestions": suggest_index.suggest(q, limit)}
 
 @api_router.get("/products/{product_id}")
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    
-    # Get variants
-    variants = await db.product_variants.find({"product_id": product_id}, {"_id": 0}).to_list(100)
-    product["variants"] = variants
+async def get_product(product_id: str, request: Request,
+                      image_size: Optional[str] = None, image_format: str = "webp"):
+    check_rendition(image_size, image_format)
+    cached = product_cache.get(product_id)
+    if cached is None:
+        product = await db.products.find_one({"id": product_id}, {"_id": 0})
+        if not product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        
+        # Get variants
+        variants = await db.product_variants.find({"product_id": product_id}, {"_id": 0}).to_list(100)
+        product["variants"] = variants
+        
+        cached = (product, *serialize(product))
+        product_cache.set(product_id, cached)
     
-    return product
+    product, body, etag = cached
+    if image_size:
+        body, etag = serialize(with_renditions(product, image_size, image_format))
+    return conditional_response(request, body, etag)
 
 @api_router.put("/products/{product_id}", dependencies=[Depends(require_admin)])
 async def update_product(product_id: str, updates: Dict[str, Any], current_user: Dict = Depends(require_admin)):
@@ -384,10 +948,14 @@ async def update_product(product_id: str, updates: Dict[str, Any], current_user:
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     
+    for field in PRODUCT_SUMMARY_FIELDS:
+        updates.pop(field, None)
     updates["updated_by"] = current_user["id"]
-    updates["updated_at"] = datetime.now(timezone.utc).isoformat()
+    updates["updated_at"] = datetime.now(timezone.utc)
     
     await db.products.update_one({"id": product_id}, {"$set": updates})
+    invalidate_catalog(product_id)
+    suggest_index.add({**product, **updates})
     await log_activity(current_user["id"], "update", "product", product_id, updates)
     
     return {"message": "Product updated successfully"}
@@ -400,6 +968,9 @@ async def delete_product(product_id: str, current_user: Dict = Depends(require_a
     
     # Delete variants
     await db.product_variants.delete_many({"product_id": product_id})
+    invalidate_catalog(product_id)
+    suggest_index.remove(product_id)
+    await bump_dashboard_stats(total_products=-1)
     await log_activity(current_user["id"], "delete", "product", product_id, {})
     
     return {"message": "Product deleted successfully"}
@@ -414,9 +985,10 @@ async def create_variant(product_id: str, variant: ProductVariantCreate, current
     
     var = ProductVariant(**variant.model_dump(), product_id=product_id)
     doc = var.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.product_variants.insert_one(doc)
+    await refresh_product_summaries(product_id)
+    invalidate_catalog(product_id)
     await log_activity(current_user["id"], "create", "variant", var.id, {"product_id": product_id})
     
     return {"id": var.id, "message": "Variant created successfully"}
@@ -430,35 +1002,286 @@ async def get_variant(variant_id: str):
 
 @api_router.put("/variants/{variant_id}", dependencies=[Depends(require_admin)])
 async def update_variant(variant_id: str, updates: Dict[str, Any], current_user: Dict = Depends(require_admin)):
-    result = await db.product_variants.update_one({"id": variant_id}, {"$set": updates})
-    if result.matched_count == 0:
+    variant = await db.product_variants.find_one_and_update(
+        {"id": variant_id},
+        {"$set": updates},
+        projection={"_id": 0, "product_id": 1}
+    )
+    if variant is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
+    # A moved variant changes both the old and the new product's summary
+    affected = {variant["product_id"], updates.get("product_id", variant["product_id"])}
+    if SUMMARY_VARIANT_FIELDS & updates.keys():
+        await refresh_product_summaries(*affected)
+    invalidate_catalog(*affected)
     
     await log_activity(current_user["id"], "update", "variant", variant_id, updates)
     return {"message": "Variant updated successfully"}
 
+# ============= CATALOG IMPORT =============
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_REPORTED_ERRORS = int(os.environ.get('IMPORT_MAX_REPORTED_ERRORS', '1000'))
+IMPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def validate_import_record(record: ImportRecord):
+    """Return ``(product, variants)`` for a parsed record, or a list of error messages."""
+    if record.error:
+        return [record.error]
+    data = dict(record.data)
+    raw_variants = data.pop("variants", None) or []
+    errors = []
+    try:
+        product = ProductCreate(**data)
+    except ValidationError as e:
+        product = None
+        errors.extend(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    if not isinstance(raw_variants, list):
+        return errors + ["variants: Input should be a valid list"]
+    variants = []
+    for i, raw in enumerate(raw_variants):
+        try:
+            variants.append(ProductVariantCreate.model_validate(raw))
+        except ValidationError as e:
+            errors.extend(f"variants.{i}.{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return errors or (product, variants)
+
+def _upsert_fields(model: BaseModel) -> Dict[str, Dict[str, Any]]:
+    # Columns present in the row overwrite; defaults only fill new documents
+    fields = model.model_dump(exclude_unset=True)
+    defaults = {k: v for k, v in model.model_dump().items() if k not in fields}
+    return {"$set": fields, "$setOnInsert": defaults}
+
+def _bulk_write_failures(error: BulkWriteError, rows: List[List[int]]) -> Dict[int, str]:
+    # rows[i] lists the input rows that operation i was built from
+    return {row: err.get("errmsg", "Write failed")
+            for err in error.details.get("writeErrors", []) for row in rows[err["index"]]}
+
+async def write_import_batch(batch: List, user_id: str) -> Dict[str, Any]:
+    """Upsert one batch of validated rows: products by SKU, then variants by
+    (product, variant SKU). Returns counts and per-row write failures."""
+    now = datetime.now(timezone.utc)
+    # Rows sharing a SKU merge into one upsert: later columns win and the
+    # variants of every row are kept
+    products: Dict[str, Dict[str, Any]] = {}
+    for row, product, variants in batch:
+        update = _upsert_fields(product)
+        entry = products.setdefault(product.sku, {"rows": [], "fields": {}, "defaults": {}, "variants": []})
+        entry["rows"].append(row)
+        entry["fields"].update(update["$set"])
+        entry["defaults"].update(update["$setOnInsert"])
+        entry["variants"].extend((row, variant) for variant in variants)
+    
+    product_ops, product_rows = [], []
+    for sku, entry in products.items():
+        fields = {**entry["fields"], "updated_by": user_id, "updated_at": now}
+        defaults = {k: v for k, v in entry["defaults"].items() if k not in fields}
+        defaults.update(id=str(uuid.uuid4()), images=[], created_by=user_id, created_at=now)
+        product_ops.append(UpdateOne({"sku": sku}, {"$set": fields, "$setOnInsert": defaults}, upsert=True))
+        product_rows.append(entry["rows"])
+    
+    failures: Dict[int, str] = {}
+    try:
+        result = await db.products.bulk_write(product_ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        failures.update(_bulk_write_failures(e, product_rows))
+    products_created = details.get("nUpserted", 0)
+    products_updated = details.get("nModified", 0)
+    
+    product_ids = {}
+    async for doc in db.products.find({"sku": {"$in": list(products)}}, SUGGEST_FIELDS):
+        product_ids[doc["sku"]] = doc["id"]
+        suggest_index.add(doc)
+    variant_ops, variant_rows, seen = [], [], {}
+    for sku, entry in products.items():
+        if entry["rows"][0] in failures or sku not in product_ids:
+            continue
+        for row, variant in entry["variants"]:
+            key = (product_ids[sku], variant.sku)
+            update = _upsert_fields(variant)
+            update["$setOnInsert"].update(id=str(uuid.uuid4()), created_at=now)
+            op = UpdateOne({"product_id": key[0], "sku": key[1]}, update, upsert=True)
+            # A repeated variant SKU keeps only its last row
+            if key in seen:
+                variant_ops[seen[key]] = op
+                variant_rows[seen[key]] = [row]
+            else:
+                seen[key] = len(variant_ops)
+                variant_ops.append(op)
+                variant_rows.append([row])
+    
+    variants_created = variants_updated = 0
+    if variant_ops:
+        try:
+            result = await db.product_variants.bulk_write(variant_ops, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            failures.update(_bulk_write_failures(e, variant_rows))
+        variants_created = details.get("nUpserted", 0)
+        variants_updated = details.get("nModified", 0)
+    
+    await refresh_product_summaries(*product_ids.values())
+    invalidate_catalog(*product_ids.values())
+    if products_created:
+        await bump_dashboard_stats(total_products=products_created)
+    return {
+        "products_created": products_created,
+        "products_updated": products_updated,
+        "variants_created": variants_created,
+        "variants_updated": variants_updated,
+        "failures": failures
+    }
+
+@api_router.post("/admin/import/products")
+async def import_products(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format"),
+    current_user: Dict = Depends(require_admin)
+):
+    """Import products and variants from a streamed CSV or NDJSON request body.
+    
+    The body is parsed as it arrives and written in batches of
+    IMPORT_BATCH_SIZE. Progress is recorded on the job in ``catalog_imports``
+    after every batch; the response lists the rows that failed.
+    """
+    if import_format is None:
+        import_format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unsupported import format; expected one of {', '.join(IMPORT_FORMATS)}")
+    
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_id": current_user["id"],
+        "format": import_format,
+        "status": "running",
+        "rows": 0,
+        "products_created": 0,
+        "products_updated": 0,
+        "variants_created": 0,
+        "variants_updated": 0,
+        "error_count": 0,
+        "started_at": datetime.now(timezone.utc)
+    }
+    await db.catalog_imports.insert_one(dict(job))
+    errors: List[Dict[str, Any]] = []
+    
+    def add_error(row: int, messages: List[str]):
+        job["error_count"] += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"row": row, "errors": messages})
+    
+    async def flush(batch):
+        counts = await write_import_batch(batch, current_user["id"])
+        for row, message in sorted(counts.pop("failures").items()):
+            add_error(row, [message])
+        for field, value in counts.items():
+            job[field] += value
+        await db.catalog_imports.update_one({"id": job["id"]}, {"$set": {
+            field: job[field] for field in ("rows", "error_count", *counts)
+        }})
+    
+    batch = []
+    try:
+        async for record in parse_import(request.stream(), import_format):
+            job["rows"] += 1
+            validated = validate_import_record(record)
+            if isinstance(validated, list):
+                add_error(record.row, validated)
+                continue
+            batch.append((record.row, *validated))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+        job["status"] = "completed"
+    except ImportEncodingError as e:
+        job["status"] = "failed"
+        add_error(e.row, [str(e)])
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{e}; import bodies must be UTF-8")
+    except Exception:
+        job["status"] = "failed"
+        raise
+    finally:
+        job["finished_at"] = datetime.now(timezone.utc)
+        await db.catalog_imports.update_one({"id": job["id"]}, {"$set": {
+            **{k: v for k, v in job.items() if k != "id"}, "errors": errors[:100]
+        }})
+    
+    await log_activity(current_user["id"], "import", "product", job["id"], {
+        k: job[k] for k in ("format", "rows", "products_created", "products_updated", "error_count")
+    })
+    return {**job, "errors": errors}
+
+@api_router.get("/admin/imports", dependencies=[Depends(require_admin)])
+async def list_imports(limit: int = 20):
+    return await db.catalog_imports.find({}, {"_id": 0, "errors": 0}).sort("started_at", -1).limit(limit).to_list(limit)
+
+@api_router.get("/admin/imports/{job_id}", dependencies=[Depends(require_admin)])
+async def get_import(job_id: str):
+    job = await db.catalog_imports.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return job
+
 # ============= CART ROUTES =============
+async def enrich_cart_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach variant and product documents to cart items in place.
+
+    Uses one bulk $in query per collection, so the number of round trips
+    stays constant regardless of cart size.
+    """
+    variant_ids = list({item["variant_id"] for item in items})
+    if not variant_ids:
+        return items
+    
+    variants = await db.product_variants.find({"id": {"$in": variant_ids}}, {"_id": 0}).to_list(len(variant_ids))
+    variants_by_id = {v["id"]: v for v in variants}
+    
+    product_ids = list({v["product_id"] for v in variants})
+    products = await db.products.find({"id": {"$in": product_ids}}, {"_id": 0}).to_list(len(product_ids)) if product_ids else []
+    products_by_id = {p["id"]: p for p in products}
+    
+    for item in items:
+        variant = variants_by_id.get(item["variant_id"])
+        if variant:
+            item["variant"] = variant
+            item["product"] = products_by_id.get(variant["product_id"])
+    
+    return items
+
 @api_router.get("/cart")
 async def get_cart(current_user: Dict = Depends(get_current_user)):
     cart = await db.carts.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not cart:
-        # Create empty cart
-        cart = Cart(user_id=current_user["id"])
-        doc = cart.model_dump()
-        doc['updated_at'] = doc['updated_at'].isoformat()
-        await db.carts.insert_one(doc)
-        return cart.model_dump()
+        # Upsert the empty cart so concurrent first requests (two tabs) share
+        # one document instead of racing the unique user_id index
+        cart = await db.carts.find_one_and_update(
+            {"user_id": current_user["id"]},
+            {"$setOnInsert": Cart(user_id=current_user["id"]).model_dump()},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
     
     # Enrich with product details
-    for item in cart.get("items", []):
-        variant = await db.product_variants.find_one({"id": item["variant_id"]}, {"_id": 0})
-        if variant:
-            product = await db.products.find_one({"id": variant["product_id"]}, {"_id": 0})
-            item["variant"] = variant
-            item["product"] = product
+    await enrich_cart_items(cart.get("items", []))
     
     return cart
 
+# Cart mutations are single atomic updates on the items array, so concurrent
+# edits (e.g. two tabs) cannot overwrite each other's changes.
+CART_ADD_ATTEMPTS = 3
+
+async def cart_item_not_found(user_id: str):
+    """Raise the right 404 after an item update matched nothing."""
+    if await db.carts.count_documents({"user_id": user_id}, limit=1):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not in cart")
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
+
 @api_router.post("/cart/items")
 async def add_to_cart(item: CartItemAdd, current_user: Dict = Depends(get_current_user)):
     # Check if variant exists
@@ -470,73 +1293,142 @@ async def add_to_cart(item: CartItemAdd, current_user: Dict = Depends(get_curren
     if variant["inventory_quantity"] < item.quantity:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient inventory")
     
-    cart = await db.carts.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    
-    if not cart:
-        cart = Cart(user_id=current_user["id"], items=[])
-        cart_items = []
-    else:
-        cart_items = cart.get("items", [])
-    
-    # Check if item already in cart
-    existing_item = next((i for i in cart_items if i["variant_id"] == item.variant_id), None)
-    
-    if existing_item:
-        existing_item["quantity"] += item.quantity
-    else:
-        cart_items.append({
-            "variant_id": item.variant_id,
-            "quantity": item.quantity,
-            "price": variant["price"]
-        })
-    
-    await db.carts.update_one(
-        {"user_id": current_user["id"]},
-        {"$set": {"items": cart_items, "updated_at": datetime.now(timezone.utc).isoformat()}},
-        upsert=True
-    )
+    user_id = current_user["id"]
+    for _ in range(CART_ADD_ATTEMPTS):
+        now = datetime.now(timezone.utc)
+        # Already in the cart: bump the quantity in place
+        result = await db.carts.update_one(
+            {"user_id": user_id, "items.variant_id": item.variant_id},
+            {"$inc": {"items.$.quantity": item.quantity}, "$set": {"updated_at": now}}
+        )
+        if result.matched_count:
+            return {"message": "Item added to cart"}
+        
+        # Not in the cart (or no cart yet): push it, unless a concurrent add got there first
+        try:
+            await db.carts.update_one(
+                {"user_id": user_id, "items.variant_id": {"$ne": item.variant_id}},
+                {
+                    "$push": {"items": {"variant_id": item.variant_id, "quantity": item.quantity, "price": variant["price"]}},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"id": str(uuid.uuid4())}
+                },
+                upsert=True
+            )
+            return {"message": "Item added to cart"}
+        except DuplicateKeyError:
+            # The cart exists and already holds the item, or another request created the cart; retry the $inc
+            continue
     
-    return {"message": "Item added to cart"}
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Cart is being modified concurrently, please retry")
 
 @api_router.put("/cart/items/{variant_id}")
 async def update_cart_item(variant_id: str, quantity: int, current_user: Dict = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    if not cart:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
-    
-    cart_items = cart.get("items", [])
-    item = next((i for i in cart_items if i["variant_id"] == variant_id), None)
-    
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not in cart")
-    
+    now = datetime.now(timezone.utc)
     if quantity <= 0:
-        cart_items = [i for i in cart_items if i["variant_id"] != variant_id]
+        update = {"$pull": {"items": {"variant_id": variant_id}}, "$set": {"updated_at": now}}
     else:
-        item["quantity"] = quantity
+        update = {"$set": {"items.$.quantity": quantity, "updated_at": now}}
     
-    await db.carts.update_one(
-        {"user_id": current_user["id"]},
-        {"$set": {"items": cart_items, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
+    result = await db.carts.update_one({"user_id": current_user["id"], "items.variant_id": variant_id}, update)
+    if not result.matched_count:
+        await cart_item_not_found(current_user["id"])
     
     return {"message": "Cart updated"}
 
 @api_router.delete("/cart/items/{variant_id}")
 async def remove_from_cart(variant_id: str, current_user: Dict = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    if not cart:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
-    
-    cart_items = [i for i in cart.get("items", []) if i["variant_id"] != variant_id]
-    
-    await db.carts.update_one(
+    result = await db.carts.update_one(
         {"user_id": current_user["id"]},
-        {"$set": {"items": cart_items, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$pull": {"items": {"variant_id": variant_id}}, "$set": {"updated_at": datetime.now(timezone.utc)}}
     )
+    if not result.matched_count:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found")
     
     return {"message": "Item removed from cart"}
 
+# ============= INVENTORY RESERVATION =============
+# Multi-document transactions need a replica set or sharded cluster.
+# MONGO_TRANSACTIONS=auto detects support at startup; on/off forces it.
+inventory_transactions_enabled = os.environ.get('MONGO_TRANSACTIONS', 'auto').lower() in ('on', 'true', '1')
+
+class InsufficientInventory(Exception):
+    def __init__(self, variant_id: str):
+        super().__init__(variant_id)
+        self.variant_id = variant_id
+
+async def detect_transaction_support() -> bool:
+    hello = await client.admin.command("hello")
+    return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+
+def _quantities_by_variant(items: List[Dict[str, Any]]) -> Dict[str, int]:
+    quantities: Dict[str, int] = {}
+    for item in items:
+        quantities[item["variant_id"]] = quantities.get(item["variant_id"], 0) + item["quantity"]
+    return quantities
+
+def _reserve_op(variant_id: str, quantity: int) -> UpdateOne:
+    return UpdateOne(
+        {"id": variant_id, "inventory_quantity": {"$gte": quantity}},
+        {"$inc": {"inventory_quantity": -quantity}}
+    )
+
+async def _reserve_in_transaction(quantities: Dict[str, int]):
+    ops = [_reserve_op(variant_id, qty) for variant_id, qty in quantities.items()]
+    
+    async def reserve(session):
+        result = await db.product_variants.bulk_write(ops, ordered=False, session=session)
+        if result.matched_count != len(ops):
+            # Raising aborts the transaction, undoing the decrements that matched.
+            # Read outside the session so our own uncommitted decrements are not seen.
+            shortfall = await db.product_variants.find_one(
+                {"$or": [{"id": variant_id, "inventory_quantity": {"$lt": qty}} for variant_id, qty in quantities.items()]},
+                {"_id": 0, "id": 1}
+            )
+            raise InsufficientInventory(shortfall["id"] if shortfall else next(iter(quantities)))
+    
+    async with await client.start_session() as session:
+        await session.with_transaction(reserve)
+
+async def _reserve_with_compensation(quantities: Dict[str, int]):
+    reserved: Dict[str, int] = {}
+    try:
+        for variant_id, qty in quantities.items():
+            result = await db.product_variants.update_one(
+                {"id": variant_id, "inventory_quantity": {"$gte": qty}},
+                {"$inc": {"inventory_quantity": -qty}}
+            )
+            if result.modified_count == 0:
+                raise InsufficientInventory(variant_id)
+            reserved[variant_id] = qty
+    except BaseException:
+        if reserved:
+            await release_inventory([{"variant_id": v, "quantity": q} for v, q in reserved.items()])
+        raise
+
+async def reserve_inventory(items: List[Dict[str, Any]]):
+    """Decrement stock for every item or for none of them.
+
+    Each decrement is guarded by ``inventory_quantity >= quantity`` so
+    concurrent checkouts cannot oversell. Raises InsufficientInventory with
+    the first variant that could not be reserved.
+    """
+    quantities = _quantities_by_variant(items)
+    if not quantities:
+        return
+    if inventory_transactions_enabled:
+        await _reserve_in_transaction(quantities)
+    else:
+        await _reserve_with_compensation(quantities)
+
+async def release_inventory(items: List[Dict[str, Any]]):
+    ops = [
+        UpdateOne({"id": variant_id}, {"$inc": {"inventory_quantity": qty}})
+        for variant_id, qty in _quantities_by_variant(items).items()
+    ]
+    if ops:
+        await db.product_variants.bulk_write(ops, ordered=False)
+
 # ============= CHECKOUT & ORDER ROUTES =============
 @api_router.post("/checkout")
 async def checkout(checkout_data: CheckoutRequest, current_user: Dict = Depends(get_current_user)):
@@ -549,12 +1441,16 @@ async def checkout(checkout_data: CheckoutRequest, current_user: Dict = Depends(
     subtotal = 0
     order_items = []
     
+    variant_ids = list({item["variant_id"] for item in cart["items"]})
+    variants = await db.product_variants.find({"id": {"$in": variant_ids}}, {"_id": 0}).to_list(len(variant_ids))
+    variants_by_id = {v["id"]: v for v in variants}
+    
     for item in cart["items"]:
-        variant = await db.product_variants.find_one({"id": item["variant_id"]}, {"_id": 0})
+        variant = variants_by_id.get(item["variant_id"])
         if not variant:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Variant {item['variant_id']} not found")
         
-        # Check inventory
+        # Early inventory check; reserve_inventory enforces it atomically
         if variant["inventory_quantity"] < item["quantity"]:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Insufficient inventory for {variant['sku']}")
         
@@ -571,12 +1467,13 @@ async def checkout(checkout_data: CheckoutRequest, current_user: Dict = Depends(
     
     # Apply coupon if provided
     discount = 0
+    applied_coupon_id = None
     if checkout_data.coupon_code:
         coupon = await db.coupons.find_one({"code": checkout_data.coupon_code}, {"_id": 0})
         if coupon and coupon["is_active"]:
             now = datetime.now(timezone.utc)
-            valid_from = datetime.fromisoformat(coupon["valid_from"]) if isinstance(coupon["valid_from"], str) else coupon["valid_from"]
-            valid_to = datetime.fromisoformat(coupon["valid_to"]) if isinstance(coupon["valid_to"], str) else coupon["valid_to"]
+            valid_from = as_utc_datetime(coupon["valid_from"])
+            valid_to = as_utc_datetime(coupon["valid_to"])
             
             if valid_from <= now <= valid_to:
                 if subtotal >= coupon["min_order_value"]:
@@ -586,64 +1483,73 @@ async def checkout(checkout_data: CheckoutRequest, current_user: Dict = Depends(
                             discount = min(discount, coupon["max_discount"])
                     else:
                         discount = coupon["value"]
-                    
-                    # Update coupon usage
-                    await db.coupons.update_one(
-                        {"id": coupon["id"]},
-                        {"$inc": {"usage_count": 1}}
-                    )
+                    applied_coupon_id = coupon["id"]
     
     # Calculate tax and shipping (simplified for MVP)
     tax = subtotal * 0.1  # 10% tax
     shipping = 10.0 if subtotal < 100 else 0
     total = subtotal - discount + tax + shipping
     
-    # Create Stripe payment intent
+    # Reserve inventory before taking payment
     try:
-        payment_intent = stripe.PaymentIntent.create(
-            amount=int(total * 100),  # Convert to paise (smallest unit)
-            currency="inr",
-            metadata={
-                "user_id": current_user["id"],
-                "email": current_user["email"]
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Payment setup failed: {str(e)}")
+        await reserve_inventory(order_items)
+    except InsufficientInventory as e:
+        sku = variants_by_id[e.variant_id]["sku"] if e.variant_id in variants_by_id else e.variant_id
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Insufficient inventory for {sku}")
     
-    # Create order
     order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
-    order = Order(
-        order_number=order_number,
-        user_id=current_user["id"],
-        items=order_items,
-        subtotal=subtotal,
-        discount=discount,
-        tax=tax,
-        shipping=shipping,
-        total=total,
-        payment_intent_id=payment_intent.id,
-        shipping_address=checkout_data.shipping_address,
-        billing_address=checkout_data.billing_address or checkout_data.shipping_address
-    )
-    
-    doc = order.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    
-    await db.orders.insert_one(doc)
-    
-    # Reserve inventory
-    for item in order_items:
-        await db.product_variants.update_one(
-            {"id": item["variant_id"]},
-            {"$inc": {"inventory_quantity": -item["quantity"]}}
+    try:
+        # Create Stripe payment intent
+        try:
+            payment_intent = await payment_gateway.create_payment_intent(
+                amount=int(total * 100),  # Convert to paise (smallest unit)
+                currency="inr",
+                metadata={
+                    "user_id": current_user["id"],
+                    "email": current_user["email"]
+                },
+                idempotency_key=order_number
+            )
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Payment setup failed: {str(e)}")
+        
+        # Create order
+        order = Order(
+            order_number=order_number,
+            user_id=current_user["id"],
+            items=order_items,
+            subtotal=subtotal,
+            discount=discount,
+            tax=tax,
+            shipping=shipping,
+            total=total,
+            payment_intent_id=payment_intent.id,
+            shipping_address=checkout_data.shipping_address,
+            billing_address=checkout_data.billing_address or checkout_data.shipping_address
         )
+        
+        doc = order.model_dump()
+        
+        await db.orders.insert_one(doc)
+    except BaseException:
+        await release_inventory(order_items)
+        raise
+    # Counted only once the order exists, so failed checkouts don't use up the coupon
+    if applied_coupon_id:
+        await db.coupons.update_one(
+            {"id": applied_coupon_id},
+            {"$inc": {"usage_count": 1}}
+        )
+    await bump_dashboard_stats(total_orders=1, pending_orders=1)
+    ordered_products = {variant["product_id"] for variant in variants}
+    await refresh_product_summaries(*ordered_products)
+    for product_id in ordered_products:
+        product_cache.invalidate(product_id)
     
     # Clear cart
     await db.carts.update_one(
         {"user_id": current_user["id"]},
-        {"$set": {"items": [], "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"items": [], "updated_at": datetime.now(timezone.utc)}}
     )
     
     await log_activity(current_user["id"], "checkout", "order", order.id, {"order_number": order_number})
@@ -663,16 +1569,20 @@ async def confirm_order(order_id: str, current_user: Dict = Depends(get_current_
     
     # Verify payment with Stripe
     try:
-        payment_intent = stripe.PaymentIntent.retrieve(order["payment_intent_id"])
+        payment_intent = await payment_gateway.retrieve_payment_intent(order["payment_intent_id"])
         if payment_intent.status == "succeeded":
-            await db.orders.update_one(
+            previous = await db.orders.find_one_and_update(
                 {"id": order_id},
                 {"$set": {
                     "status": OrderStatus.CONFIRMED,
                     "payment_status": "paid",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }}
+                    "updated_at": datetime.now(timezone.utc)
+                }},
+                projection={"_id": 0, "status": 1, "total": 1},
+                return_document=ReturnDocument.BEFORE
             )
+            if previous:
+                await record_order_status_change(previous.get("status"), OrderStatus.CONFIRMED, previous.get("total", 0))
             await log_activity(current_user["id"], "confirm", "order", order_id, {})
             return {"message": "Order confirmed", "status": "confirmed"}
         else:
@@ -681,10 +1591,14 @@ async def confirm_order(order_id: str, current_user: Dict = Depends(get_current_
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @api_router.get("/orders")
-async def list_orders(current_user: Dict = Depends(get_current_user), skip: int = 0, limit: int = 50):
+async def list_orders(current_user: Dict = Depends(get_current_user), skip: int = 0, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, with_total: bool = True):
     query = {"user_id": current_user["id"]}
+    total = await count_total(db.orders, query, with_total)
+    if cursor is not None:
+        orders, next_cursor = await find_page(db.orders, query, {"_id": 0}, CREATED_AT_SORT, limit, cursor)
+        return {"orders": orders, "total": total, "next_cursor": next_cursor}
+    
     orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.orders.count_documents(query)
     return {"orders": orders, "total": total}
 
 @api_router.get("/orders/{order_id}")
@@ -696,25 +1610,32 @@ async def get_order(order_id: str, current_user: Dict = Depends(get_current_user
 
 # ============= ADMIN ORDER ROUTES =============
 @api_router.get("/admin/orders")
-async def admin_list_orders(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = 50, status: Optional[OrderStatus] = None):
+async def admin_list_orders(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), status: Optional[OrderStatus] = None, cursor: Optional[str] = None, with_total: bool = True, approximate_total: bool = False):
     query = {}
     if status:
         query["status"] = status
     
+    total = await count_total(db.orders, query, with_total, approximate_total, cached=True)
+    if cursor is not None:
+        orders, next_cursor = await find_page(db.orders, query, {"_id": 0}, CREATED_AT_SORT, limit, cursor)
+        return {"orders": orders, "total": total, "next_cursor": next_cursor}
+    
     orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.orders.count_documents(query)
     return {"orders": orders, "total": total}
 
 @api_router.put("/admin/orders/{order_id}/status")
-async def update_order_status(order_id: str, status: OrderStatus, current_user: Dict = Depends(require_admin)):
-    result = await db.orders.update_one(
+async def update_order_status(order_id: str, new_status: OrderStatus = Query(..., alias="status"), current_user: Dict = Depends(require_admin)):
+    previous = await db.orders.find_one_and_update(
         {"id": order_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"status": new_status, "updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "status": 1, "total": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    await record_order_status_change(previous.get("status"), new_status, previous.get("total", 0))
     
-    await log_activity(current_user["id"], "update_status", "order", order_id, {"status": status})
+    await log_activity(current_user["id"], "update_status", "order", order_id, {"status": new_status})
     return {"message": "Order status updated"}
 
 # ============= COUPON ROUTES =============
@@ -727,9 +1648,6 @@ async def create_coupon(coupon: CouponCreate, current_user: Dict = Depends(requi
     
     coup = Coupon(**coupon.model_dump(), created_by=current_user["id"])
     doc = coup.model_dump()
-    doc['valid_from'] = doc['valid_from'].isoformat()
-    doc['valid_to'] = doc['valid_to'].isoformat()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.coupons.insert_one(doc)
     await log_activity(current_user["id"], "create", "coupon", coup.id, {"code": coup.code})
@@ -737,9 +1655,9 @@ async def create_coupon(coupon: CouponCreate, current_user: Dict = Depends(requi
     return {"id": coup.id, "message": "Coupon created successfully"}
 
 @api_router.get("/admin/coupons")
-async def list_coupons(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = 50):
+async def list_coupons(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), with_total: bool = True, approximate_total: bool = False):
     coupons = await db.coupons.find({}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-    total = await db.coupons.count_documents({})
+    total = await count_total(db.coupons, {}, with_total, approximate_total, cached=True)
     return {"coupons": coupons, "total": total}
 
 @api_router.get("/coupons/validate/{code}")
@@ -749,8 +1667,8 @@ async def validate_coupon(code: str):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid coupon")
     
     now = datetime.now(timezone.utc)
-    valid_from = datetime.fromisoformat(coupon["valid_from"]) if isinstance(coupon["valid_from"], str) else coupon["valid_from"]
-    valid_to = datetime.fromisoformat(coupon["valid_to"]) if isinstance(coupon["valid_to"], str) else coupon["valid_to"]
+    valid_from = as_utc_datetime(coupon["valid_from"])
+    valid_to = as_utc_datetime(coupon["valid_to"])
     
     if not (valid_from <= now <= valid_to):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Coupon expired")
@@ -762,9 +1680,13 @@ async def validate_coupon(code: str):
 
 # ============= ADMIN USER ROUTES =============
 @api_router.get("/admin/users")
-async def list_users(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = 50):
+async def list_users(current_user: Dict = Depends(require_admin), skip: int = 0, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, with_total: bool = True, approximate_total: bool = False):
+    total = await count_total(db.users, {}, with_total, approximate_total, cached=True)
+    if cursor is not None:
+        users, next_cursor = await find_page(db.users, {}, {"_id": 0, "hashed_password": 0}, CREATED_AT_SORT, limit, cursor)
+        return {"users": users, "total": total, "next_cursor": next_cursor}
+    
     users = await db.users.find({}, {"_id": 0, "hashed_password": 0}).skip(skip).limit(limit).to_list(limit)
-    total = await db.users.count_documents({})
     return {"users": users, "total": total}
 
 @api_router.put("/admin/users/{user_id}/role")
@@ -775,18 +1697,35 @@ async def update_user_role(user_id: str, role: UserRole, current_user: Dict = De
     result = await db.users.update_one({"id": user_id}, {"$set": {"role": role}})
     if result.matched_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    user_cache.invalidate(user_id)
     
     await log_activity(current_user["id"], "update_role", "user", user_id, {"role": role})
     return {"message": "User role updated"}
 
+@api_router.put("/admin/users/{user_id}/status")
+async def update_user_status(user_id: str, is_active: bool, current_user: Dict = Depends(require_admin)):
+    if current_user["role"] != UserRole.SUPER_ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Super admin access required")
+    
+    result = await db.users.update_one({"id": user_id}, {"$set": {"is_active": is_active}})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    user_cache.invalidate(user_id)
+    
+    await log_activity(current_user["id"], "activate" if is_active else "deactivate", "user", user_id, {"is_active": is_active})
+    return {"message": "User status updated"}
+
 # ============= ACTIVITY LOGS =============
 @api_router.get("/admin/activity-logs")
 async def get_activity_logs(
     current_user: Dict = Depends(require_admin),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     user_id: Optional[str] = None,
-    action_type: Optional[str] = None
+    action_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    approximate_total: bool = False
 ):
     query = {}
     if user_id:
@@ -794,50 +1733,181 @@ async def get_activity_logs(
     if action_type:
         query["action_type"] = action_type
     
+    total = await count_total(db.activity_logs, query, with_total, approximate_total, cached=True)
+    if cursor is not None:
+        logs, next_cursor = await find_page(db.activity_logs, query, {"_id": 0}, TIMESTAMP_SORT, limit, cursor)
+        return {"logs": logs, "total": total, "next_cursor": next_cursor}
+    
     logs = await db.activity_logs.find(query, {"_id": 0}).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.activity_logs.count_documents(query)
     return {"logs": logs, "total": total}
 
 # ============= ADMIN DASHBOARD STATS =============
 @api_router.get("/admin/dashboard/stats")
-async def dashboard_stats(current_user: Dict = Depends(require_admin)):
-    total_users = await db.users.count_documents({})
-    total_products = await db.products.count_documents({})
-    total_orders = await db.orders.count_documents({})
-    pending_orders = await db.orders.count_documents({"status": OrderStatus.PENDING})
-    
-    # Calculate revenue (sum of confirmed orders)
-    pipeline = [
-        {"$match": {"status": {"$in": [OrderStatus.CONFIRMED, OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED]}}},
-        {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
-    ]
-    revenue_result = await db.orders.aggregate(pipeline).to_list(1)
-    total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
-    
-    return {
-        "total_users": total_users,
-        "total_products": total_products,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "total_revenue": total_revenue
+async def dashboard_stats(current_user: Dict = Depends(require_admin), fresh: bool = False):
+    # fresh=true recomputes from the source collections instead of the stored counters
+    stats = None if fresh else await db.dashboard_stats.find_one({"id": DASHBOARD_STATS_ID}, {"_id": 0})
+    if stats is None:
+        stats = await reconcile_dashboard_stats()
+    return {field: stats.get(field, 0) for field in DASHBOARD_STATS_FIELDS}
+
+# ============= ADMIN SYSTEM STATS =============
+@api_router.get("/admin/system/stats")
+async def system_stats(current_user: Dict = Depends(require_admin)):
+    return subsystem_stats()
+
+def subsystem_stats() -> Dict[str, Dict[str, Any]]:
+    stats = {
+        "password_pool": password_pool.stats(),
+        "image_pool": image_pool.stats(),
+        "rendition_pool": rendition_pool.stats(),
+        "rendition_cache": rendition_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "activity_log_writer": activity_log_writer.stats(),
+        "count_cache": count_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "product_list_cache": product_list_cache.stats(),
+        "suggest_index": suggest_index.stats()
     }
+    if slow_query_monitor:
+        stats["slow_queries"] = slow_query_monitor.stats()
+    return stats
+
+# ============= SLOW QUERY LOG =============
+@api_router.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def slow_queries(limit: int = Query(20, ge=1, le=500), sort: str = "total_ms"):
+    """Slowest query shapes seen since startup (needs SLOW_QUERY_MS)."""
+    if slow_query_monitor is None:
+        return {"enabled": False, "queries": []}
+    if sort not in ("total_ms", "max_ms", "count"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="sort must be total_ms, max_ms or count")
+    return {"enabled": True, **slow_query_monitor.stats(), "queries": slow_query_monitor.top(limit, sort)}
+
+@api_router.delete("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def reset_slow_queries():
+    if slow_query_monitor:
+        slow_query_monitor.reset()
+    return {"message": "Slow query log cleared"}
 
 # ============= IMAGE UPLOAD =============
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """Parse a single-range ``Range`` header into inclusive (start, end).
+
+    Returns None when the header is absent or not a single byte range (serve
+    the whole blob) and raises 416 when the range cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def _verify_image(contents: bytes) -> str:
+    """Check that ``contents`` is a well-formed image and return its PIL format."""
+    img = Image.open(BytesIO(contents))
+    width, height = img.size
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image too large: {width}x{height}")
+    img.verify()
+    return img.format
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Read an upload in chunks, rejecting it as soon as it is not a supported
+    image or grows past ``max_bytes``."""
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image too large")
+    
+    header = await file.read(SNIFF_BYTES)
+    if sniff_image_format(header) not in IMAGE_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image format")
+    
+    buffer = bytearray(header)
+    while chunk := await file.read(IMAGE_READ_CHUNK_BYTES):
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image too large")
+    return bytes(buffer)
+
 @api_router.post("/upload/image")
-async def upload_image(file: UploadFile = File(...), current_user: Dict = Depends(get_current_user)):
+async def upload_image(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                       current_user: Dict = Depends(get_current_user)):
     # Read and validate image
-    contents = await file.read()
+    contents = await read_upload(file, IMAGE_MAX_UPLOAD_BYTES)
     try:
-        img = Image.open(BytesIO(contents))
-        img.verify()
+        image_format = await image_pool.run(_verify_image, contents)
     except Exception:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file")
+    if image_format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported image format: {image_format}")
+    
+    # Store once by content hash; products keep only the short URL
+    key = await image_store.put(contents, IMAGE_FORMATS[image_format][0])
+    if IMAGE_PREGENERATE_RENDITIONS:
+        background_tasks.add_task(rendition_cache.generate_all, key, contents)
+    base_url = PUBLIC_API_URL or str(request.base_url).rstrip('/')
+    
+    return {"url": f"{base_url}/api/images/{key}", "key": key}
+
+@api_router.get("/images/{key}")
+async def get_image(key: str, request: Request, size: Optional[str] = None,
+                    image_format: str = Query("webp", alias="format")):
+    if not KEY_PATTERN.match(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    if size is not None:
+        return await get_image_rendition(key, size, image_format, request)
+    info = await image_store.info(key)
+    if info is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    byte_range = parse_range(request.headers.get("range"), info.size)
+    if byte_range is None:
+        start, end, status_code = 0, info.size - 1, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    headers["Content-Length"] = str(end - start + 1)
     
-    # Convert to base64 for storage (in production, use S3/CDN)
-    img_base64 = base64.b64encode(contents).decode('utf-8')
-    image_url = f"data:image/{file.filename.split('.')[-1]};base64,{img_base64}"
+    return StreamingResponse(image_store.stream(key, start, end), status_code=status_code,
+                             media_type=info.content_type, headers=headers)
+
+async def get_image_rendition(key: str, size: str, image_format: str, request: Request):
+    check_rendition(size, image_format)
+    etag = f'"{key}-{size}.{image_format}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    return {"url": image_url}
+    try:
+        data = await rendition_cache.get(key, size, image_format, lambda: image_store.read(key))
+    except Exception:
+        logger.exception(f"Could not render {size}.{image_format} for image {key}")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Image could not be resized")
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return Response(content=data, media_type=RENDITION_FORMATS[image_format][1], headers=headers)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+metrics.register_collector(subsystem_stats)
 
 # Include router
 app.include_router(api_router)
@@ -849,6 +1919,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -856,24 +1929,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+dashboard_stats_task: Optional[asyncio.Task] = None
+suggest_index_task: Optional[asyncio.Task] = None
+summary_backfill_task: Optional[asyncio.Task] = None
+
 @app.on_event("startup")
 async def startup_db():
-    # Create indexes
-    await db.products.create_index([("sku", 1)], unique=True)
-    await db.products.create_index([("category", 1)])
-    await db.users.create_index([("email", 1)], unique=True)
-    await db.coupons.create_index([("code", 1)], unique=True)
-    await db.orders.create_index([("user_id", 1)])
-    await db.orders.create_index([("order_number", 1)], unique=True)
-    
-    # Create text index for search
-    try:
-        await db.products.create_index([("title", "text"), ("description", "text")])
-    except:
-        pass  # Index might already exist
-    
-    logger.info("Database indexes created")
+    # Reconcile indexes against the manifest in indexes.py
+    report = await reconcile_indexes(db, drop_unknown=os.environ.get('INDEX_DROP_UNKNOWN', 'false').lower() == 'true')
+    for collection_name, actions in report.items():
+        if any(actions.values()):
+            logger.info(f"Indexes on {collection_name}: {actions}")
+    
+    logger.info("Database indexes reconciled")
+    
+    global inventory_transactions_enabled
+    if os.environ.get('MONGO_TRANSACTIONS', 'auto').lower() == 'auto':
+        try:
+            inventory_transactions_enabled = await detect_transaction_support()
+        except Exception:
+            inventory_transactions_enabled = False
+        logger.info(f"Inventory reservation uses transactions: {inventory_transactions_enabled}")
+    
+    activity_log_writer.start()
+    if slow_query_monitor:
+        slow_query_monitor.start(client)
+    
+    global dashboard_stats_task
+    dashboard_stats_task = asyncio.create_task(run_dashboard_stats_reconciler())
+    
+    global summary_backfill_task
+    summary_backfill_task = asyncio.create_task(backfill_product_summaries())
+    
+    await rebuild_suggest_index()
+    logger.info(f"Suggest index loaded: {suggest_index.stats()}")
+    if SUGGEST_REFRESH_SECONDS > 0:
+        global suggest_index_task
+        suggest_index_task = asyncio.create_task(run_suggest_index_refresher())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if dashboard_stats_task is not None:
+        dashboard_stats_task.cancel()
+    if suggest_index_task is not None:
+        suggest_index_task.cancel()
+    if summary_backfill_task is not None:
+        summary_backfill_task.cancel()
+    await activity_log_writer.stop()
+    if slow_query_monitor:
+        await slow_query_monitor.stop()
+    await payment_gateway.close()
+    client.close()
+    password_pool.shutdown()
+    image_pool.shutdown()
+    rendition_pool.shutdown()
\ No newline at end of file
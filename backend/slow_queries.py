@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+# Commands that read or write by filter, and where each keeps its filter
+FILTER_LOCATIONS = {
+    "find": lambda cmd: cmd.get("filter", {}),
+    "count": lambda cmd: cmd.get("query", {}),
+    "distinct": lambda cmd: cmd.get("query", {}),
+    "findAndModify": lambda cmd: cmd.get("query", {}),
+    "update": lambda cmd: (cmd.get("updates") or [{}])[0].get("q", {}),
+    "delete": lambda cmd: (cmd.get("deletes") or [{}])[0].get("q", {}),
+    "aggregate": lambda cmd: next((stage["$match"] for stage in cmd.get("pipeline", []) if "$match" in stage), {}),
+}
+# Driver bookkeeping that must not be sent back inside an explain
+SESSION_FIELDS = {"lsid", "txnNumber", "$clusterTime", "$db", "$readPreference", "readConcern", "writeConcern",
+                  "startTransaction", "autocommit", "apiVersion", "apiStrict", "apiDeprecationErrors"}
+
+
+def query_shape(value: Any) -> Any:
+    """Replace literal values with ``"?"`` while keeping field names and
+    operators, so ``{"user_id": "u1"}`` and ``{"user_id": "u2"}`` match."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, list):
+        shapes = []
+        for item in value:
+            shape = query_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def plan_summary(plan: Any) -> List[str]:
+    """Stage names of an explain plan, outermost first."""
+    stages = []
+    while isinstance(plan, dict):
+        stage = plan.get("stage")
+        if stage:
+            stages.append(f"{stage}({plan['indexName']})" if plan.get("indexName") else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+    return stages
+
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """Records MongoDB commands slower than ``threshold_ms``, grouped by
+    collection, command and normalized filter shape.
+
+    Each group remembers the routes that issued it. The first time a shape
+    is seen, an ``explain`` of that command is queued and run in the
+    background, once. At most ``max_shapes`` groups are kept.
+    """
+
+    def __init__(self, threshold_ms: float, explain: bool = True, max_shapes: int = 500):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self._started: Dict[Tuple, Tuple[Optional[str], Dict]] = {}
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._explain_queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+        self.dropped = 0
+
+    # pymongo listener callbacks run on the thread that issued the command
+
+    def started(self, event) -> None:
+        if event.command_name not in FILTER_LOCATIONS:
+            return
+        stats = current_request.get()
+        route = f"{stats.method} {stats.route}" if stats is not None else None
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (route, event.command)
+
+    def succeeded(self, event) -> None:
+        self._finish(event)
+
+    def failed(self, event) -> None:
+        self._finish(event)
+
+    def _finish(self, event) -> None:
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        seconds = event.duration_micros / 1_000_000
+        if started is None or seconds < self.threshold:
+            return
+
+        route, command = started
+        collection = command.get(event.command_name)
+        shape = query_shape(FILTER_LOCATIONS[event.command_name](command))
+        if event.command_name == "find" and command.get("sort"):
+            shape = {"filter": shape, "sort": query_shape(command["sort"])}
+        key = json.dumps([event.database_name, collection, event.command_name, shape], sort_keys=True, default=str)
+
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self.dropped += 1
+                    return
+                entry = self._shapes[key] = {
+                    "database": event.database_name,
+                    "collection": collection,
+                    "command": event.command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": {},
+                    "first_seen": time.time(),
+                    "explain": None,
+                }
+                queue_explain = self.explain
+            else:
+                queue_explain = False
+            entry["count"] += 1
+            entry["total_ms"] += seconds * 1000
+            entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+            entry["last_seen"] = time.time()
+            if route:
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+        logger.warning("Slow query %.1fms %s.%s %s from %s", seconds * 1000, collection,
+                       event.command_name, json.dumps(shape, default=str), route or "background")
+        if queue_explain and self._loop is not None:
+            explainable = {k: v for k, v in command.items() if k not in SESSION_FIELDS}
+            self._loop.call_soon_threadsafe(self._explain_queue.put_nowait,
+                                            (key, event.database_name, explainable))
+
+    # Explain capture
+
+    def start(self, client) -> None:
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._explain_queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run_explains())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    async def _run_explains(self) -> None:
+        while True:
+            key, database, command = await self._explain_queue.get()
+            try:
+                result = await self._client[database].command({"explain": command, "verbosity": "queryPlanner"})
+                planner = result.get("queryPlanner") or (result.get("stages") or [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+                explain = {"winning_plan": plan_summary(planner.get("winningPlan")),
+                           "namespace": planner.get("namespace")}
+            except Exception as e:
+                explain = {"error": str(e)}
+            with self._lock:
+                if key in self._shapes:
+                    self._shapes[key]["explain"] = explain
+
+    # Reporting
+
+    def top(self, limit: int = 20, sort: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [dict(entry, routes=dict(entry["routes"])) for entry in self._shapes.values()]
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        for entry in entries:
+            entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        return entries[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+            self.dropped = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "shapes": len(self._shapes),
+                "slow_commands": sum(entry["count"] for entry in self._shapes.values()),
+                "dropped_shapes": self.dropped,
+                "pending_explains": self._explain_queue.qsize() if self._explain_queue else 0,
+            }
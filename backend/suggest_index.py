@@ -0,0 +1,138 @@
+import bisect
+import re
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+# Separates a term from its product id inside a key; sorts before any text
+KEY_SEPARATOR = "\x00"
+MAX_TERM_LENGTH = 64
+
+
+def normalize(text: str) -> str:
+    return " ".join(TOKEN_PATTERN.findall(text.lower()))
+
+
+def product_terms(product: Dict[str, Any]) -> List[str]:
+    """Prefixes of these terms match the product: the whole title, SKU and
+    each tag, plus every word within them."""
+    terms = []
+    for text in [product.get("title"), product.get("sku"), *(product.get("tags") or [])]:
+        text = normalize(text or "")
+        terms += [text, *text.split()]
+    seen = []
+    for term in terms:
+        term = term[:MAX_TERM_LENGTH]
+        if term and term not in seen:
+            seen.append(term)
+    return seen
+
+
+class SuggestIndex:
+    """Per-process prefix index over active products' titles, SKUs and tags.
+
+    Keys are ``term + "\\0" + product_id`` in one sorted list, so a prefix
+    lookup is a binary search followed by a short forward scan. Updates
+    insert and remove individual keys. At most ``max_products`` products
+    are indexed; once full, new products are counted as dropped until a
+    rebuild makes room.
+    """
+
+    def __init__(self, max_products: int = 100_000, max_scan: int = 200):
+        self.max_products = max_products
+        self.max_scan = max_scan
+        self._keys: List[str] = []
+        # product id -> (title, sku, terms)
+        self._products: Dict[str, Tuple[str, str, List[str]]] = {}
+        self.dropped = 0
+        self.lookups = 0
+
+    async def rebuild(self, products: AsyncIterator[Dict[str, Any]]) -> None:
+        """Replace the contents with ``products`` (already filtered to the
+        ones that should be suggested)."""
+        entries: Dict[str, Tuple[str, str, List[str]]] = {}
+        keys: List[str] = []
+        dropped = 0
+        async for product in products:
+            if len(entries) >= self.max_products:
+                dropped += 1
+                continue
+            terms = product_terms(product)
+            entries[product["id"]] = (product.get("title", ""), product.get("sku", ""), terms)
+            keys.extend(term + KEY_SEPARATOR + product["id"] for term in terms)
+        keys.sort()
+        self._keys, self._products, self.dropped = keys, entries, dropped
+
+    def add(self, product: Dict[str, Any]) -> None:
+        """Index or re-index one product; inactive products are removed."""
+        self.remove(product["id"])
+        if product.get("status", "active") != "active":
+            return
+        if len(self._products) >= self.max_products:
+            self.dropped += 1
+            return
+        terms = product_terms(product)
+        self._products[product["id"]] = (product.get("title", ""), product.get("sku", ""), terms)
+        for term in terms:
+            bisect.insort(self._keys, term + KEY_SEPARATOR + product["id"])
+
+    def remove(self, product_id: str) -> None:
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        for term in entry[2]:
+            key = term + KEY_SEPARATOR + product_id
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Products with a term starting with the whole query (titles are
+        indexed whole, so "red sh" finds "Red Shirt"), then products where
+        every query word starts some term.
+
+        The word lookup scans from the longest word, the most selective
+        one. Exact term matches rank first, then shorter titles. Each scan
+        examines at most ``max_scan`` keys, which bounds the cost of very
+        short prefixes.
+        """
+        self.lookups += 1
+        words = normalize(query).split()
+        if not words:
+            return []
+        candidates = self._scan(" ".join(words))
+        if len(words) > 1:
+            longest = max(words, key=len)
+            for product_id, exact in self._scan(longest).items():
+                terms = self._products[product_id][2]
+                if product_id not in candidates and all(any(t.startswith(w) for t in terms) for w in words):
+                    candidates[product_id] = exact
+
+        ranked = []
+        for product_id, exact in candidates.items():
+            title, sku, _ = self._products[product_id]
+            ranked.append((not exact, len(title), title, product_id, sku))
+        ranked.sort()
+        return [{"id": product_id, "title": title, "sku": sku}
+                for _, _, title, product_id, sku in ranked[:limit]]
+
+    def _scan(self, prefix: str) -> Dict[str, bool]:
+        # product id -> whether some term equals the prefix exactly
+        prefix = prefix[:MAX_TERM_LENGTH]
+        candidates: Dict[str, bool] = {}
+        start = bisect.bisect_left(self._keys, prefix)
+        for key in self._keys[start:start + self.max_scan]:
+            if not key.startswith(prefix):
+                break
+            separator = key.index(KEY_SEPARATOR)
+            product_id = key[separator + 1:]
+            candidates[product_id] = candidates.get(product_id, False) or separator == len(prefix)
+        return candidates
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "products": len(self._products),
+            "keys": len(self._keys),
+            "max_products": self.max_products,
+            "dropped": self.dropped,
+            "lookups": self.lookups,
+        }
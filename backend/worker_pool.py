@@ -0,0 +1,82 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class BoundedWorkerPool:
+    """Runs blocking callables off the event loop with a concurrency cap.
+
+    Callers beyond ``max_concurrency`` wait on a semaphore instead of piling
+    up inside the executor, which keeps queue depth and wait time observable.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_concurrency: Optional[int] = None,
+                 use_processes: bool = False, sample_size: int = 1024):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_samples = deque(maxlen=sample_size)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            executor_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            kwargs = {} if self.use_processes else {"thread_name_prefix": self.name}
+            self._executor = executor_cls(max_workers=self.max_workers, **kwargs)
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        waited = time.perf_counter() - queued_at
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._wait_samples.append(waited)
+
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self._running -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._wait_samples)
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+        return {
+            "name": self.name,
+            "executor": "process" if self.use_processes else "thread",
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._waiting,
+            "in_flight": self._running,
+            "completed": self._completed,
+            "wait_seconds_total": self._wait_total,
+            "wait_seconds_max": self._wait_max,
+            "wait_seconds_p99": p99,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
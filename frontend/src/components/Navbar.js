@@ -1,7 +1,78 @@
-import { Link } from 'react-router-dom';
-import { ShoppingCart, User, LogOut, LayoutDashboard, Menu, X } from 'lucide-react';
-import { useState } from 'react';
+import { Link, useNavigate } from 'react-router-dom';
+import { ShoppingCart, User, LogOut, LayoutDashboard, Menu, X, Search } from 'lucide-react';
+import { useEffect, useState } from 'react';
 import { Button } from './ui/button';
+import { Input } from './ui/input';
+import { axiosInstance } from '../App';
+
+function SearchBox() {
+  const navigate = useNavigate();
+  const [query, setQuery] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
+  const [open, setOpen] = useState(false);
+
+  useEffect(() => {
+    if (!query.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    // Suggestions come from an in-memory index, so a short debounce is enough
+    const timer = setTimeout(async () => {
+      try {
+        const { data } = await axiosInstance.get(`/products/suggest?q=${encodeURIComponent(query)}`);
+        setSuggestions(data.suggestions);
+      } catch (error) {
+        setSuggestions([]);
+      }
+    }, 80);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  const submit = (e) => {
+    e.preventDefault();
+    if (!query.trim()) return;
+    setOpen(false);
+    navigate(`/products?q=${encodeURIComponent(query.trim())}`);
+  };
+
+  return (
+    <form onSubmit={submit} className="relative w-64" data-testid="navbar-search">
+      <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-gray-400 w-4 h-4" />
+      <Input
+        type="text"
+        placeholder="Search products..."
+        value={query}
+        onChange={(e) => {
+          setQuery(e.target.value);
+          setOpen(true);
+        }}
+        onFocus={() => setOpen(true)}
+        onBlur={() => setTimeout(() => setOpen(false), 150)}
+        className="pl-9"
+        data-testid="navbar-search-input"
+      />
+      {open && suggestions.length > 0 && (
+        <ul className="absolute mt-1 w-full bg-white border rounded-lg shadow-lg overflow-hidden" data-testid="search-suggestions">
+          {suggestions.map(s => (
+            <li key={s.id}>
+              <Link
+                to={`/products/${s.id}`}
+                onClick={() => {
+                  setOpen(false);
+                  setQuery('');
+                }}
+                className="block px-3 py-2 text-sm text-gray-700 hover:bg-gray-100"
+              >
+                {s.title}
+                <span className="ml-2 text-xs text-gray-400">{s.sku}</span>
+              </Link>
+            </li>
+          ))}
+        </ul>
+      )}
+    </form>
+  );
+}
 
 export default function Navbar({ user, onShowAuth, onLogout, cartCount }) {
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
@@ -22,6 +93,8 @@ export default function Navbar({ user, onShowAuth, onLogout, cartCount }) {
 
           {/* Desktop Navigation */}
           <div className="hidden md:flex items-center space-x-8">
+            <SearchBox />
+
             <Link to="/products" className="text-gray-700 hover:text-blue-600 font-medium" data-testid="products-nav-link">
               Products
             </Link>
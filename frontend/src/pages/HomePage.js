@@ -16,7 +16,7 @@ export default function HomePage({ user, onShowAuth }) {
 
   const fetchFeaturedProducts = async () => {
     try {
-      const { data } = await axiosInstance.get('/products?limit=6');
+      const { data } = await axiosInstance.get('/products?limit=6&image_size=medium');
       setFeaturedProducts(data.products);
     } catch (error) {
       console.error('Error fetching products:', error);
@@ -1,4 +1,5 @@
 import { useEffect, useState } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import { Search, Filter, X } from 'lucide-react';
 import { Input } from '../components/ui/input';
 import { Button } from '../components/ui/button';
@@ -9,27 +10,40 @@ import { toast } from 'sonner';
 export default function ProductsPage() {
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
-  const [search, setSearch] = useState('');
+  const [searchParams] = useSearchParams();
+  const [search, setSearch] = useState(searchParams.get('q') || '');
   const [category, setCategory] = useState('');
+  const [sort, setSort] = useState('');
   const [categories, setCategories] = useState([]);
 
+  useEffect(() => {
+    setSearch(searchParams.get('q') || '');
+  }, [searchParams]);
+
   useEffect(() => {
     fetchProducts();
-  }, [category, search]);
+  }, [category, search, sort]);
 
   const fetchProducts = async () => {
     setLoading(true);
     try {
-      let url = '/products?limit=100';
-      if (category) url += `&category=${category}`;
-      if (search) url += `&search=${search}`;
+      // Searches are relevance-ranked and come with category facets
+      let url = search
+        ? `/products/search?q=${encodeURIComponent(search)}&limit=100&image_size=medium`
+        : '/products?limit=100&image_size=medium';
+      if (category) url += `&category=${encodeURIComponent(category)}`;
+      if (sort && !search) url += `&sort=${sort}`;
       
       const { data } = await axiosInstance.get(url);
       setProducts(data.products);
       
-      // Extract unique categories
-      const uniqueCategories = [...new Set(data.products.map(p => p.category))];
-      setCategories(uniqueCategories);
+      if (data.facets) {
+        setCategories(data.facets.categories.map(c => c.category));
+      } else {
+        // Extract unique categories
+        const uniqueCategories = [...new Set(data.products.map(p => p.category))];
+        setCategories(uniqueCategories);
+      }
     } catch (error) {
       console.error('Error fetching products:', error);
       toast.error('Failed to load products');
@@ -83,6 +97,19 @@ export default function ProductsPage() {
                 ))}
               </select>
 
+              {!search && (
+                <select
+                  value={sort}
+                  onChange={(e) => setSort(e.target.value)}
+                  className="px-4 py-2 border rounded-lg bg-white"
+                  data-testid="sort-select"
+                >
+                  <option value="">Newest</option>
+                  <option value="price_asc">Price: Low to High</option>
+                  <option value="price_desc">Price: High to Low</option>
+                </select>
+              )}
+
               {(search || category) && (
                 <Button 
                   variant="outline" 
@@ -0,0 +1,27 @@
+"""Shared setup: put backend/ on the path and configure server.py for tests.
+
+server.py connects at import time, so this runs before any test module
+imports it. The app gets an in-memory mongomock-motor database; tests that
+need a real MongoDB (query plans) open their own client through the
+``motor_client_class`` fixture.
+"""
+import os
+import sys
+from pathlib import Path
+
+import motor.motor_asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ["DB_NAME"] = "ecommerce_test"
+os.environ["PAYMENT_GATEWAY"] = "fake"
+
+# Kept before the swap below, for tests that talk to a real server
+REAL_MOTOR_CLIENT = motor.motor_asyncio.AsyncIOMotorClient
+motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+
+@pytest.fixture(scope="session")
+def motor_client_class():
+    return REAL_MOTOR_CLIENT
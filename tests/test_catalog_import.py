@@ -0,0 +1,77 @@
+"""Catalog import against an in-memory MongoDB (mongomock-motor)."""
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+CSV_HEADER = "sku,title,description,category,variant_sku,price,inventory_quantity\n"
+
+
+@pytest.fixture
+def admin():
+    async def reset():
+        await server.client.drop_database(os.environ["DB_NAME"])
+
+    with TestClient(server.app) as client:
+        client.portal.call(reset)
+        client.post("/api/auth/register", json={"email": "admin@example.com", "password": "x", "full_name": "Admin"})
+        client.portal.call(lambda: server.db.users.update_one({"email": "admin@example.com"},
+                                                              {"$set": {"role": "admin"}}))
+        token = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "x"}).json()["access_token"]
+        yield client, {"Authorization": f"Bearer {token}"}
+
+
+def imported_variants(client, sku):
+    product = next(p for p in client.get("/api/products").json()["products"] if p["sku"] == sku)
+    detail = client.get(f"/api/products/{product['id']}").json()
+    return detail, sorted(v["sku"] for v in detail["variants"])
+
+
+def test_csv_rows_sharing_a_sku_keep_every_variant(admin):
+    client, headers = admin
+    body = CSV_HEADER + (
+        "P1,Shirt,First,Apparel,P1-R,10,1\n"
+        "P2,Mug,A mug,Kitchen,P2-A,5,1\n"
+        "P1,Shirt v2,Second,Apparel,P1-B,12,2\n"
+    )
+    job = client.post("/api/admin/import/products?format=csv", content=body.encode(), headers=headers).json()
+
+    assert job["status"] == "completed"
+    assert job["error_count"] == 0
+    assert job["products_created"] == 2
+    assert job["variants_created"] == 3
+    detail, variants = imported_variants(client, "P1")
+    assert variants == ["P1-B", "P1-R"]
+    assert detail["title"] == "Shirt v2"
+    assert (detail["min_price"], detail["max_price"], detail["total_stock"]) == (10, 12, 3)
+
+
+def test_ndjson_lines_sharing_a_sku_keep_every_variant(admin):
+    client, headers = admin
+    lines = [
+        {"sku": "Q1", "title": "Lamp", "description": "d", "category": "Home",
+         "variants": [{"sku": "Q1-A", "price": 20, "inventory_quantity": 1}]},
+        {"sku": "Q1", "title": "Lamp", "description": "d", "category": "Home",
+         "variants": [{"sku": "Q1-B", "price": 25, "inventory_quantity": 1}]},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+    job = client.post("/api/admin/import/products?format=ndjson", content=body.encode(), headers=headers).json()
+
+    assert job["status"] == "completed"
+    assert job["error_count"] == 0
+    assert job["variants_created"] == 2
+    assert imported_variants(client, "Q1")[1] == ["Q1-A", "Q1-B"]
+
+
+def test_non_utf8_body_fails_the_job_with_400(admin):
+    client, headers = admin
+    body = CSV_HEADER.encode() + b"P1,Shirt,\xff\xfe,Apparel,P1-R,10,1\n"
+    response = client.post("/api/admin/import/products?format=csv", content=body, headers=headers)
+
+    assert response.status_code == 400
+    assert "Line 2 is not valid UTF-8" in response.json()["detail"]
+    job = client.get("/api/admin/imports", headers=headers).json()[0]
+    assert (job["status"], job["error_count"]) == ("failed", 1)
@@ -0,0 +1,153 @@
+"""Query-plan regression check: no route query may need a COLLSCAN.
+
+Reconciles the index manifest (indexes.py) on a throwaway database, inserts
+a few sample documents so the planner has real work to do, then runs
+``explain`` on the filter/sort shape of every indexed route query. Needs a
+reachable MongoDB (MONGO_URL); skipped otherwise, since mongomock has no
+query planner.
+
+Keep ROUTE_QUERIES in step with server.py when adding or changing queries.
+Unfiltered, unsorted listings (e.g. list_coupons) scan by design and are
+not listed.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+import server
+from indexes import reconcile_indexes
+
+# Sorts as the routes pass them, so a changed constant is checked as-is
+CREATED_AT_SORT = dict(server.CREATED_AT_SORT)
+TIMESTAMP_SORT = dict(server.TIMESTAMP_SORT)
+PRICE_ASC = dict(server.PRICE_SORTS["price_asc"])
+PRICE_DESC = dict(server.PRICE_SORTS["price_desc"])
+CURSOR_STAMP = datetime(2024, 6, 1, tzinfo=timezone.utc)
+CURSOR_AFTER = {"$or": [{"created_at": {"$lt": CURSOR_STAMP}},
+                        {"created_at": CURSOR_STAMP, "id": {"$lt": "m"}}]}
+
+ROUTE_QUERIES = [
+    ("get_current_user", "users", {"id": "u1"}, None),
+    ("register / login", "users", {"email": "u1@example.com"}, None),
+    ("list_users?cursor", "users", {}, CREATED_AT_SORT),
+    ("list_products", "products", {}, CREATED_AT_SORT),
+    ("list_products?category", "products", {"category": "Electronics"}, CREATED_AT_SORT),
+    ("list_products?status", "products", {"status": "active"}, CREATED_AT_SORT),
+    ("list_products?search", "products", {"$text": {"$search": "laptop"}}, None),
+    ("search_products?status", "products", {"$text": {"$search": "laptop"}, "status": "active"}, None),
+    ("list_products?cursor", "products", CURSOR_AFTER, CREATED_AT_SORT),
+    ("list_products?category&cursor", "products", {"category": "Electronics", **CURSOR_AFTER}, CREATED_AT_SORT),
+    ("list_products?min_price&max_price", "products", {"min_price": {"$gte": 10, "$lte": 50}}, None),
+    ("list_products?sort=price", "products", {"min_price": {"$ne": None}}, PRICE_ASC),
+    ("list_products?category&sort=price", "products", {"category": "Electronics", "min_price": {"$ne": None}},
+     PRICE_DESC),
+    ("list_products?status&price&sort", "products", {"status": "active", "min_price": {"$gte": 10, "$ne": None}},
+     PRICE_ASC),
+    ("list_products?attr", "products", {"attribute_values": {"$all": ["color:black"]}}, None),
+    ("refresh_product_summaries", "product_variants", {"product_id": {"$in": ["p0", "p1"]}}, None),
+    ("get_product / update_product", "products", {"id": "p1"}, None),
+    ("create_product", "products", {"sku": "SKU-1"}, None),
+    ("get_product variants", "product_variants", {"product_id": "p1"}, None),
+    ("get_variant / add_to_cart", "product_variants", {"id": "v1"}, None),
+    ("get_cart / checkout enrichment", "product_variants", {"id": {"$in": ["v1", "v2"]}}, None),
+    ("reserve_inventory", "product_variants", {"id": "v1", "inventory_quantity": {"$gte": 1}}, None),
+    ("get_cart / cart mutations", "carts", {"user_id": "u1"}, None),
+    ("list_orders", "orders", {"user_id": "u1"}, CREATED_AT_SORT),
+    ("list_orders?cursor", "orders", {"user_id": "u1", **CURSOR_AFTER}, CREATED_AT_SORT),
+    ("get_order / confirm_order", "orders", {"id": "o1", "user_id": "u1"}, None),
+    ("admin_list_orders", "orders", {}, CREATED_AT_SORT),
+    ("admin_list_orders?status", "orders", {"status": "pending"}, CREATED_AT_SORT),
+    ("update_order_status", "orders", {"id": "o1"}, None),
+    ("validate_coupon / checkout", "coupons", {"code": "WELCOME10"}, None),
+    ("get_activity_logs", "activity_logs", {}, TIMESTAMP_SORT),
+    ("get_activity_logs?user_id", "activity_logs", {"user_id": "u1"}, TIMESTAMP_SORT),
+    ("get_activity_logs?action_type", "activity_logs", {"action_type": "create"}, TIMESTAMP_SORT),
+    ("dashboard_stats", "dashboard_stats", {"id": "dashboard"}, None),
+    ("import_products (product upsert)", "products", {"sku": {"$in": ["SKU-0", "SKU-1"]}}, None),
+    ("import_products (variant upsert)", "product_variants", {"product_id": "p1", "sku": "SKU-1-V"}, None),
+    ("list_imports", "catalog_imports", {}, {"started_at": -1}),
+    ("get_import", "catalog_imports", {"id": "j1"}, None),
+]
+
+
+async def seed(db):
+    # Two documents per collection so the planner does not short-circuit to EOF
+    for i in range(2):
+        stamp = datetime(2024, i + 1, 1, tzinfo=timezone.utc)
+        await db.users.insert_one({"id": f"u{i}", "email": f"u{i}@example.com", "created_at": stamp})
+        await db.products.insert_one({"id": f"p{i}", "sku": f"SKU-{i}", "title": "Laptop", "description": "A laptop",
+                                      "category": "Electronics", "status": "active", "created_at": stamp,
+                                      "min_price": 10.0 * (i + 1), "attribute_values": ["color:black"]})
+        await db.product_variants.insert_one({"id": f"v{i}", "product_id": f"p{i}", "sku": f"SKU-{i}-V",
+                                              "inventory_quantity": 5})
+        await db.carts.insert_one({"id": f"c{i}", "user_id": f"u{i}", "items": []})
+        await db.orders.insert_one({"id": f"o{i}", "order_number": f"ORD-{i}", "user_id": f"u{i}",
+                                    "status": "pending", "created_at": stamp})
+        await db.coupons.insert_one({"id": f"k{i}", "code": f"CODE{i}"})
+        await db.activity_logs.insert_one({"id": f"l{i}", "user_id": f"u{i}", "action_type": "create",
+                                           "timestamp": stamp})
+        await db.catalog_imports.insert_one({"id": f"j{i}", "started_at": stamp})
+    await db.dashboard_stats.insert_one({"id": "dashboard"})
+
+
+def plan_stages(plan):
+    """Yield every stage name in a (possibly nested) explain plan."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+def plan_stages(plan):
+    """Yield every stage name in a (possibly nested) explain plan."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def explain_all(client_class):
+    client = client_class(os.environ.get("MONGO_URL", "mongodb://localhost:27017"), serverSelectionTimeoutMS=2000)
+    db_name = f"ecommerce_test_plans_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    try:
+        await client.admin.command("ping")
+        await seed(db)
+        await reconcile_indexes(db)
+        plans = {}
+        for route, collection, query, sort in ROUTE_QUERIES:
+            command = {"find": collection, "filter": query, "limit": 50}
+            if sort:
+                command["sort"] = sort
+            result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            plans[route] = list(plan_stages(result["queryPlanner"]["winningPlan"]))
+        await client.drop_database(db_name)
+        return plans
+    finally:
+        client.close()
+
+
+@pytest.fixture(scope="module")
+def route_plans(motor_client_class):
+    try:
+        return asyncio.run(explain_all(motor_client_class))
+    except ServerSelectionTimeoutError:
+        pytest.skip("MongoDB is not reachable at MONGO_URL")
+
+
+@pytest.mark.parametrize("route", [route for route, *_ in ROUTE_QUERIES])
+def test_route_query_uses_an_index(route_plans, route):
+    stages = route_plans[route]
+    assert "COLLSCAN" not in stages, f"{route}: {' > '.join(stages)}"
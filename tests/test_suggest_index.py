@@ -0,0 +1,50 @@
+"""Prefix lookups in the in-memory search suggestion index."""
+import asyncio
+
+from suggest_index import SuggestIndex
+
+
+def build(products, **kwargs):
+    async def stream():
+        for product in products:
+            yield product
+
+    index = SuggestIndex(**kwargs)
+    asyncio.run(index.rebuild(stream()))
+    return index
+
+
+def titles(results):
+    return [result["title"] for result in results]
+
+
+def test_longer_multi_word_query_keeps_its_match():
+    # Enough "shiny ..." keys to exhaust the scan for "sh" on its own
+    products = [{"id": f"lamp-{i:03d}", "sku": f"L{i:03d}", "title": "Shiny Lamp"} for i in range(300)]
+    products.append({"id": "shirt", "sku": "S1", "title": "Red Shirt"})
+    index = build(products)
+
+    assert titles(index.suggest("red")) == ["Red Shirt"]
+    assert titles(index.suggest("red sh")) == ["Red Shirt"]
+    assert titles(index.suggest("red shirt")) == ["Red Shirt"]
+
+
+def test_words_match_in_any_order():
+    index = build([
+        {"id": "p1", "sku": "A1", "title": "Blue Cotton Shirt"},
+        {"id": "p2", "sku": "A2", "title": "Blue Mug"},
+    ])
+
+    assert titles(index.suggest("shirt blue")) == ["Blue Cotton Shirt"]
+    assert titles(index.suggest("blue")) == ["Blue Mug", "Blue Cotton Shirt"]
+
+
+def test_updates_and_inactive_products():
+    index = build([{"id": "p1", "sku": "A1", "title": "Desk Lamp"}])
+    index.add({"id": "p1", "sku": "A1", "title": "Floor Lamp"})
+    index.add({"id": "p2", "sku": "A2", "title": "Lamp Shade", "status": "draft"})
+
+    assert titles(index.suggest("lamp")) == ["Floor Lamp"]
+    assert index.suggest("desk") == []
+    index.remove("p1")
+    assert index.suggest("lamp") == []